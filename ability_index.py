@@ -0,0 +1,349 @@
+# ability_index.py
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+LABEL_GAP = 1 << 16  # 相邻编号之间预留的间隔，新增节点可以直接插进空隙而不必重新编号
+
+
+class AbilityTree:
+    """
+    能力标签层级的索引。
+
+    - 邻接索引：父能力名称 -> 子能力列表，建立索引和按关键字过滤都只遍历一次标签树。
+    - 区间编码：先序遍历时给每个节点分配进入/离开编号 (tin, tout)，子孙节点的区间嵌套在祖先的区间内，
+      “X 是否是 Y 的子孙”是 O(1) 的比较，“Y 子树中的所有节点”是按 tin 排序后的一段区间。
+      编号之间留有空隙，添加、重命名、移动节点时只在空隙不够时才整体重新编号。
+    """
+
+    def __init__(self, abilities):
+        """
+        :param abilities: AbilityTag 列表
+        """
+        self.rebuild(abilities)
+
+    def rebuild(self, abilities):
+        """按 abilities 重新建立索引，O(n)。"""
+        self.abilities = abilities
+        self.by_name = {}
+        self.children = defaultdict(list)
+        self.roots = []
+        self._lower_names = {}
+        for ability in abilities:
+            self.by_name.setdefault(ability.name, ability)
+            self._lower_names[ability.name] = ability.name.lower()
+            if ability.parent:
+                self.children[ability.parent].append(ability)
+            else:
+                self.roots.append(ability)
+        self._last_search = (None, None)
+        self._relabel()
+
+    @property
+    def size(self):
+        return len(self.by_name)
+
+    def children_of(self, ability):
+        return self.children.get(ability.name, [])
+
+    def walk(self, roots=None):
+        """按先序遍历从根节点可达的能力标签，返回 (能力标签, 深度)。"""
+        stack = [(root, 0) for root in reversed(self.roots if roots is None else roots)]
+        visited = set()
+        while stack:
+            ability, depth = stack.pop()
+            if ability.name in visited:
+                continue
+            visited.add(ability.name)
+            yield ability, depth
+            for child in reversed(self.children_of(ability)):
+                stack.append((child, depth + 1))
+
+    # ----------------- 区间编码 ----------------- #
+    def _relabel(self):
+        """整棵树重新编号。"""
+        self.tin = {}
+        self.tout = {}
+        self._sorted_tins = []
+        self._name_at = {}
+        self._label_subtrees(self.roots, 0, (len(self.by_name) * 2 + 1) * LABEL_GAP)
+
+    def _label_subtrees(self, roots, low, high):
+        """
+        在开区间 (low, high) 内按先序为 roots 及其子孙均匀分配编号。
+        调用方需保证空隙足够：high - low > 2 * 节点数。
+        """
+        order = list(self.walk(roots))
+        step = (high - low) // (len(order) * 2 + 1)
+        label = low
+        exits = []  # (深度, 名称)，等待分配离开编号的祖先
+        for ability, depth in order:
+            while exits and exits[-1][0] >= depth:
+                label += step
+                self._set_label(exits.pop()[1], tout=label)
+            label += step
+            self._set_label(ability.name, tin=label)
+            exits.append((depth, ability.name))
+        while exits:
+            label += step
+            self._set_label(exits.pop()[1], tout=label)
+
+    def _set_label(self, name, tin=None, tout=None):
+        if tin is not None:
+            insort(self._sorted_tins, tin)
+            self._name_at[tin] = name
+            self.tin[name] = tin
+        if tout is not None:
+            self.tout[name] = tout
+
+    def _clear_labels(self, names):
+        for name in names:
+            tin = self.tin.pop(name, None)
+            self.tout.pop(name, None)
+            if tin is not None:
+                self._sorted_tins.pop(bisect_left(self._sorted_tins, tin))
+                del self._name_at[tin]
+
+    def _free_slot(self, ability):
+        """ability 作为其父节点的最后一个子节点（或最后一个根节点）时可用的编号空隙 (low, high)。"""
+        siblings = self.children_of(self.by_name[ability.parent]) if ability.parent in self.by_name else self.roots
+        low = None
+        for sibling in reversed(siblings):
+            if sibling is not ability and sibling.name in self.tout:
+                low = self.tout[sibling.name]
+                break
+        if ability.parent in self.tin:
+            high = self.tout[ability.parent]
+            if low is None:
+                low = self.tin[ability.parent]
+        else:
+            # 根节点排在最后，右侧没有上界
+            if low is None:
+                low = max(self.tout.values(), default=0)
+            high = low + (self.size * 2 + 1) * LABEL_GAP
+        return low, high
+
+    def _place(self, ability):
+        """给刚挂到新位置的 ability 子树分配编号；父节点不可达时不编号。"""
+        if ability.parent and ability.parent not in self.tin:
+            return
+        names = [a.name for a, _ in self.walk([ability])]
+        low, high = self._free_slot(ability)
+        if high - low > 2 * len(names):
+            self._label_subtrees([ability], low, high)
+        else:
+            self._relabel()
+
+    def is_descendant(self, name, ancestor_name):
+        """name 是否是 ancestor_name 本身或其子孙节点，O(1)。"""
+        if name in self.tin and ancestor_name in self.tin:
+            return self.tin[ancestor_name] <= self.tin[name] <= self.tout[ancestor_name]
+        # 不可达的节点没有编号，沿父节点向上查找
+        return ancestor_name in self.ancestors(name)
+
+    def subtree_names(self, name):
+        """name 子树中（含自身）所有能力名称，按先序排列。"""
+        if name not in self.tin:
+            return [name] if name in self.by_name else []
+        low = bisect_left(self._sorted_tins, self.tin[name])
+        high = bisect_right(self._sorted_tins, self.tout[name])
+        return [self._name_at[tin] for tin in self._sorted_tins[low:high]]
+
+    def subtree_ranges(self):
+        """
+        按先序（tin）排列的能力名称，以及每个能力的子树在这个序列中的下标区间 [start, end)。
+        子树总是先序中连续的一段，按区间对前缀和作差即可得到整棵子树的合计。
+        """
+        names = [self._name_at[tin] for tin in self._sorted_tins]
+        ranges = {}
+        for start, name in enumerate(names):
+            ranges[name] = (start, bisect_right(self._sorted_tins, self.tout[name]))
+        return names, ranges
+
+    def ancestors(self, name):
+        """从 name 到根节点的能力名称链（含自身），遇到环时停止。"""
+        chain = []
+        seen = set()
+        while name and name not in seen:
+            seen.add(name)
+            chain.append(name)
+            ability = self.by_name.get(name)
+            name = ability.parent if ability else None
+        return chain
+
+    # ----------------- 增量更新 ----------------- #
+    def add(self, ability):
+        """添加一个新的能力标签（叶子节点）。"""
+        self.by_name.setdefault(ability.name, ability)
+        self._lower_names[ability.name] = ability.name.lower()
+        if ability.parent:
+            self.children[ability.parent].append(ability)
+        else:
+            self.roots.append(ability)
+        # 之前挂在这个名称下的孤儿节点现在变得可达
+        if self.children.get(ability.name):
+            self._relabel()
+        else:
+            self._place(ability)
+        self._last_search = (None, None)
+
+    def remove(self, ability):
+        """删除一个能力标签；其子节点（如果有）变为不可达。"""
+        names = [a.name for a, _ in self.walk([ability])]
+        siblings = self.children.get(ability.parent) if ability.parent else self.roots
+        if siblings is not None and ability in siblings:
+            siblings.remove(ability)
+        if self.by_name.get(ability.name) is ability:
+            del self.by_name[ability.name]
+            self._lower_names.pop(ability.name, None)
+        self._clear_labels(names)
+        self._last_search = (None, None)
+
+    def rename(self, old_name, new_name):
+        """
+        能力标签已改名为 new_name 后更新索引；子节点的 parent 字段由调用方修改。
+        编号不变。
+        """
+        ability = self.by_name.pop(old_name)
+        self.by_name[new_name] = ability
+        self._lower_names.pop(old_name, None)
+        self._lower_names[new_name] = new_name.lower()
+        if old_name in self.children:
+            self.children[new_name] = self.children.pop(old_name)
+        if old_name in self.tin:
+            tin = self.tin.pop(old_name)
+            self.tin[new_name] = tin
+            self.tout[new_name] = self.tout.pop(old_name)
+            self._name_at[tin] = new_name
+        self._last_search = (None, None)
+
+    def move(self, ability, old_parent):
+        """ability 的 parent 已从 old_parent 改为新值后更新索引，整个子树随之移动。"""
+        siblings = self.children.get(old_parent) if old_parent else self.roots
+        if siblings is not None and ability in siblings:
+            siblings.remove(ability)
+        if ability.parent:
+            self.children[ability.parent].append(ability)
+        else:
+            self.roots.append(ability)
+        self._clear_labels([a.name for a, _ in self.walk([ability])])
+        self._place(ability)
+        self._last_search = (None, None)
+
+    # ----------------- 搜索 ----------------- #
+    def matching_names(self, search_term):
+        """
+        返回自身或某个子孙节点名称包含 search_term 的能力名称集合（不区分大小写）。
+
+        后序遍历一次标签树，每个子树的匹配结果只计算一次。关键字在上一次的基础上变长时，
+        新的匹配一定在上一次的结果之内，只需在这些节点中重新判断。
+        """
+        term = search_term.lower()
+        last_term, last_matches = self._last_search
+        if last_term is not None and last_term in term:
+            candidates = last_matches
+        else:
+            candidates = None
+
+        direct = set()
+        for name, lower in self._lower_names.items():
+            if (candidates is None or name in candidates) and term in lower:
+                direct.add(name)
+
+        matches = set()
+        order = [ability for ability, _ in self.walk()]
+        for ability in reversed(order):  # 子节点总在父节点之后，逆序即后序
+            name = ability.name
+            if name in direct or any(child.name in matches for child in self.children_of(ability)):
+                matches.add(name)
+
+        self._last_search = (term, matches)
+        return matches
+
+
+class AbilitySearchIndex:
+    """
+    能力名称的 n-gram 索引，供各个搜索框按子串过滤能力标签。
+
+    每个名称（小写）按单字和相邻两字建立倒排表，中文名称同样适用。查询时取关键字中
+    各个二元组倒排表的交集再核对子串；关键字在上一次的基础上变长时直接在上一次的结果里筛选。
+    """
+
+    def __init__(self, names):
+        """
+        :param names: 能力名称列表，查询结果按此顺序返回
+        """
+        self.rebuild(names)
+
+    def rebuild(self, names):
+        self._lower = {}
+        self._order = {}
+        self._postings = defaultdict(set)
+        self._next_order = 0
+        self._last_query = (None, None)
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def _grams(text):
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+
+    @property
+    def size(self):
+        return len(self._lower)
+
+    def add(self, name):
+        if name in self._lower:
+            return
+        lower = name.lower()
+        self._lower[name] = lower
+        self._order[name] = self._next_order
+        self._next_order += 1
+        for gram in self._grams(lower):
+            self._postings[gram].add(name)
+        self._last_query = (None, None)
+
+    def remove(self, name):
+        lower = self._lower.pop(name, None)
+        if lower is None:
+            return
+        del self._order[name]
+        for gram in self._grams(lower):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(name)
+                if not postings:
+                    del self._postings[gram]
+        self._last_query = (None, None)
+
+    def rename(self, old_name, new_name):
+        """改名后保留原来的排列位置。"""
+        position = self._order.get(old_name)
+        self.remove(old_name)
+        self.add(new_name)
+        if position is not None:
+            self._order[new_name] = position
+
+    def search(self, term):
+        """
+        返回名称包含 term 的能力名称（不区分大小写），按建立索引时的顺序排列。
+
+        :param term: 搜索关键字，为空时返回全部名称
+        """
+        term = term.lower()
+        if not term:
+            return sorted(self._lower, key=self._order.get)
+
+        last_term, last_results = self._last_query
+        if last_term and last_term in term:
+            candidates = last_results
+        else:
+            grams = [term] if len(term) == 1 else [term[i:i + 2] for i in range(len(term) - 1)]
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        results = [name for name in candidates if term in self._lower[name]]
+        results.sort(key=self._order.get)
+        self._last_query = (term, results)
+        return results
@@ -0,0 +1,65 @@
+# background_writer.py
+
+import queue
+import threading
+
+
+class BackgroundWriter:
+    """
+    后台持久化线程。
+
+    保存请求按键（集合名称）排队，由工作线程执行，界面线程不必等待 JSON 序列化和磁盘写入。
+    同一个键在短时间内的多次保存会合并成一次写入；flush() 等待所有排队的写入完成。
+    """
+
+    def __init__(self, delay=0.3, maxsize=32):
+        """
+        :param delay: 取出一个保存请求后等待的秒数，期间同一集合的后续保存会被合并
+        :param maxsize: 队列容量，队列满时 submit 会阻塞，避免积压无限增长
+        """
+        self.delay = delay
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._pending = {}  # 键 -> (payload, write)
+        self._lock = threading.Lock()
+        self._flushing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, payload, write, merge=None):
+        """
+        提交一次保存。
+
+        :param key: 合并写入的键，通常是集合名称
+        :param payload: 要写入的数据，需在调用线程中准备好（例如 to_dict() 的结果）
+        :param write: 在工作线程中调用的写入函数 write(payload)
+        :param merge: 可选的合并函数 merge(旧 payload, 新 payload)；默认新数据直接覆盖旧数据
+        """
+        with self._lock:
+            queued = key in self._pending
+            if queued and merge is not None:
+                payload = merge(self._pending[key][0], payload)
+            self._pending[key] = (payload, write)
+        if not queued:
+            self._queue.put(key)
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            try:
+                # 等待一小段时间，让紧接着的保存合并进来；flush 时不等待
+                self._flushing.wait(self.delay)
+                with self._lock:
+                    payload, write = self._pending.pop(key)
+                write(payload)
+            except Exception as e:
+                print(f"后台保存 {key} 时出错: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """阻塞直到所有已提交的保存都写入完成。"""
+        self._flushing.set()
+        try:
+            self._queue.join()
+        finally:
+            self._flushing.clear()
@@ -2,13 +2,57 @@
 
 import json
 import os
-from models import Task, DiaryEntry, PeriodicSummary, Project, AbilityTag, DailyProgress, Goal
+from models import Task, DiaryEntry, PeriodicSummary, Project, AbilityTag, DailyProgress, Goal, new_id
 from collections import defaultdict
+import atexit
+import glob
 import tempfile
-import shutil
+import threading
+from sqlite_storage import SQLiteStorage, TABLES
+from progress_journal import ProgressJournal
+from progress_index import ProgressIndex
+from recall_log import RecallLog
+from background_writer import BackgroundWriter
+
+
+def _merge_row_payloads(old, new):
+    """
+    合并两次排队中的 SQLite 写入。
+
+    payload 为 (kind, {表名: (行, 删除的主键)})，行为 {主键: (pos, 记录)}：
+    kind 为 'all' 时整表替换为这些行，为 'rows' 时只写入这些行并删除给定主键的行。
+    """
+    new_kind, new_tables = new
+    if new_kind == 'all':
+        return new
+    old_kind, old_tables = old
+    tables = {}
+    for table, (rows, deletes) in old_tables.items():
+        rows, deletes = dict(rows), set(deletes)
+        new_rows, new_deletes = new_tables.get(table, ({}, ()))
+        for key in new_deletes:
+            rows.pop(key, None)
+            if old_kind == 'rows':
+                deletes.add(key)
+        rows.update(new_rows)
+        deletes.difference_update(new_rows)
+        tables[table] = (rows, deletes)
+    return (old_kind, tables)
+
+
+def _embeds_abilities(record, key):
+    """记录是否还是内嵌完整能力标签字典的旧格式。"""
+    refs = record.get(key)
+    return isinstance(refs, dict) or any(isinstance(ref, dict) for ref in refs or [])
+
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, backend='json', db_file='todo.db', background=True):
+        """
+        :param backend: 存储后端，'json'（默认，每个集合一个 JSON 文件）或 'sqlite'
+        :param db_file: SQLite 后端使用的数据库文件
+        :param background: 为 True 时保存操作交给后台线程执行，界面不会因写盘而卡顿
+        """
         # 定义数据文件路径
         self.tasks_file = "tasks.json"
         self.diary_file = "diary.json"
@@ -17,148 +61,588 @@ class DataManager:
         self.abilities_file = "abilities.json"
         self.daily_progress_file = "daily_progress.json"
         self.goals_file = "goals.json"  # 添加目标文件路径
+        self.progress_journal_file = "progress_journal.jsonl"  # 进度更新的追加日志
+        self.search_index_file = "search_index.json"  # 全文检索索引（可由数据重建）
+        self.recall_log_file = "recall_log.bin"  # 知识点回忆事件的追加日志
+        self._recall_log = None
+
+        # 每个集合最近一次加载/保存时的 (对象, 版本号) 列表，用于只写入有变化的数据
+        self._saved_state = {}
+        # SQLite 后端：表名 -> {主键: (pos, 对象, 版本号)}，与数据库中的行一致
+        self._stored_rows = {}
+        # 后台线程写入失败时会丢弃上面记录的状态，与界面线程的比较和记录互斥
+        self._state_lock = threading.RLock()
+
+        # 任务和项目的进度事件按日期建立的索引，供 synchronize_daily_progress 增量更新
+        self.progress_index = ProgressIndex()
+        self._daily_progress_by_date = (None, {})
+        # 上次加载失败的集合：快照文件损坏时不能用加载到的空列表覆盖它
+        self._load_failed = set()
+        # 最近一次写入失败的集合 -> 异常，写入成功后移除
+        self._write_errors = {}
+
+        # 后台写入线程；退出前务必调用 flush()
+        self.writer = None
+        if background:
+            self.writer = BackgroundWriter()
+            atexit.register(self.flush)
+
+        self._remove_stale_temp_files()
+
+        self.storage = None
+        if backend == 'sqlite':
+            self.storage = SQLiteStorage(db_file)
+            if self.storage.is_empty():
+                self.migrate_json_to_sqlite()
+        elif backend != 'json':
+            raise ValueError(f"未知的存储后端: {backend}")
+
+        # 启动时把上次运行遗留的进度日志合并进快照
+        self.progress_journal = ProgressJournal(self.progress_journal_file)
+        if self.progress_journal.count:
+            self.compact_progress_journal(self.load_tasks(), self.load_projects())
+
+    # ----------------- 存储后端 ----------------- #
+    def flush(self):
+        """等待所有排队中的保存写入完成。关闭窗口前调用，保证数据不丢失。"""
+        if self.writer:
+            self.writer.flush()
+
+    def _submit_write(self, collection, payload, write, merge=None):
+        def write_and_record(data):
+            try:
+                write(data)
+            except Exception as e:
+                # 存储中的数据与记录的状态不再一致，下一次保存时整体重写
+                with self._state_lock:
+                    self._write_errors[collection] = e
+                    self._forget_saved(collection)
+                raise
+            self._write_errors.pop(collection, None)
+
+        if self.writer:
+            self.writer.submit(collection, payload, write_and_record, merge)
+        else:
+            write_and_record(payload)
+
+    def written(self, *collections):
+        """flush() 之后调用：这些集合最近一次的写入是否都已成功落盘。"""
+        return not any(collection in self._write_errors for collection in collections)
+
+    def _write_sqlite_payload(self, payload):
+        kind, tables = payload
+        if kind == 'all':
+            self.storage.replace_tables({table: [(key, pos, record) for key, (pos, record) in rows.items()]
+                                         for table, (rows, _) in tables.items()})
+        else:
+            self.storage.update_tables({table: ([(key, pos, record) for key, (pos, record) in rows.items()], deletes)
+                                        for table, (rows, deletes) in tables.items()})
+
+    def _read_json_file(self, path):
+        """读取 JSON 文件中的记录列表；文件不存在时返回 None。"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = f.read().strip()
+            if not data:
+                return []
+            return json.loads(data)
+
+    def _read_records(self, collection, path):
+        """从当前后端读取一个集合的原始记录；没有数据时返回 None。"""
+        # 先写完排队中的保存，保证读到的是最新数据
+        self.flush()
+        if self.storage:
+            if collection == 'abilities':
+                return self._read_sqlite_abilities()
+            return self.storage.load(collection) or None
+        return self._read_json_file(path)
+
+    def _read_sqlite_abilities(self):
+        abilities = self.storage.load('abilities')
+        if not abilities:
+            return None
+        # 知识点单独成表，按所属能力标签重新挂回
+        kp_by_ability = defaultdict(list)
+        for kp in self.storage.load('knowledge_points'):
+            kp_by_ability[kp.pop('ability')].append(kp)
+        for ability in abilities:
+            ability['knowledge_points'] = kp_by_ability.get(ability['name'], [])
+        return abilities
+
+    def _split_abilities(self, abilities):
+        """能力标签的记录拆成能力标签表和知识点表的记录，知识点记录所属能力的名称。"""
+        ability_rows = []
+        kp_rows = []
+        for ability in abilities:
+            row = dict(ability)
+            for kp in row.pop('knowledge_points', []):
+                kp_rows.append(dict(kp, ability=row['name']))
+            ability_rows.append(row)
+        return {'abilities': ability_rows, 'knowledge_points': kp_rows}
+
+    def _table_rows(self, collection, items):
+        """
+        集合在 SQLite 中对应的各表的行。每张表的行分成若干组，pos 只表示组内的顺序。
+
+        :return: {表名: [[(主键, 对象, 版本号, 生成记录的函数)]]}
+        """
+        if collection != 'abilities':
+            key = TABLES[collection]
+            return {collection: [[(getattr(item, key), item, item.version, item.to_dict) for item in items]]}
+        # 能力标签行只含自身字段；知识点单独成行，按所属能力分组，
+        # 给一个能力添加知识点不会影响其它能力的知识点行。能力改名后其知识点行也要重写
+        ability_rows = []
+        kp_groups = []
+        for ability in items:
+            ability_rows.append((ability.name, ability, ability.own_version,
+                                 lambda a=ability: self._split_abilities([a.to_dict()])['abilities'][0]))
+            kp_groups.append([(kp.id, kp, (kp.version, ability.name),
+                               lambda kp=kp, name=ability.name: dict(kp.to_dict(), ability=name))
+                              for kp in ability.knowledge_points])
+        return {'abilities': [ability_rows], 'knowledge_points': kp_groups}
+
+    def _track_stored_rows(self, collection, items):
+        """加载后记录数据库中每一行的位置及对应的对象，之后的保存据此只写入有变化的行。"""
+        for table, groups in self._table_rows(collection, items).items():
+            positions = self.storage.positions(table)
+            # 没有对应对象的行（例如重复的主键）在下一次保存时删除
+            stored = {key: (pos, None, None) for key, pos in positions.items()}
+            for rows in groups:
+                for key, item, version, _ in rows:
+                    if key in positions:
+                        stored[key] = (positions[key], item, version)
+            self._stored_rows[table] = stored
+
+    def _diff_rows(self, table, groups):
+        """
+        与数据库中的行比较，得出需要写入的行和需要删除的主键，并更新记录的状态。
+
+        顺序不变的行保留原来的 pos；新增的行和顺序改变的行取组内前一行的 pos 加一，
+        后面 pos 不再递增的行依次顺延。删除一行或在末尾添加一行都不改动其它行。
+        """
+        stored = self._stored_rows[table]
+        current = {}
+        changed = {}
+        for rows in groups:
+            previous = -1
+            for key, item, version, to_record in rows:
+                old = stored.get(key)
+                if old is not None and old[0] > previous:
+                    if old[1] is item and old[2] == version:
+                        current[key] = old
+                        previous = old[0]
+                        continue
+                    pos = old[0]
+                else:
+                    pos = previous + 1
+                changed[key] = (pos, to_record())
+                current[key] = (pos, item, version)
+                previous = pos
+        deletes = {key for key in stored if key not in current}
+        self._stored_rows[table] = current
+        return changed, deletes
+
+    def _sqlite_payload(self, collection, items):
+        """SQLite 后端本次保存的 payload；没有需要写入的内容时返回 None。"""
+        tables = self._table_rows(collection, items)
+        if any(table not in self._stored_rows for table in tables):
+            # 没有与数据库一致的状态（首次写入或上次写入失败），整表替换
+            payload = {}
+            for table, groups in tables.items():
+                stored = self._stored_rows[table] = {}
+                rows = {}
+                for group in groups:
+                    for pos, (key, item, version, to_record) in enumerate(group):
+                        stored[key] = (pos, item, version)
+                        rows[key] = (pos, to_record())
+                payload[table] = (rows, set())
+            return ('all', payload)
+        payload = {table: self._diff_rows(table, groups) for table, groups in tables.items()}
+        if not any(changed or deletes for changed, deletes in payload.values()):
+            return None
+        return ('rows', payload)
+
+    def _write_json(self, path, data):
+        """
+        原子地写入 JSON 文件：先写同目录下的临时文件并 fsync，再用 os.replace 替换。
+        崩溃时原文件要么是旧版本、要么是新版本，不会只写了一半。
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_name = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_name, path)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
+        # 让目录项的变更也落盘（Windows 不支持打开目录，忽略即可）
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+    def _remove_stale_temp_files(self):
+        """
+        删除上次崩溃时遗留的临时文件。
+        数据文件只会被完整地替换，所以恢复时无需逐条校验记录。
+        """
+        data_files = [self.tasks_file, self.diary_file, self.summaries_file, self.projects_file,
+                      self.abilities_file, self.daily_progress_file, self.goals_file, self.search_index_file]
+        for path in data_files:
+            for temp_name in glob.glob(glob.escape(path) + '.*.tmp'):
+                try:
+                    os.remove(temp_name)
+                except OSError as e:
+                    print(f"删除临时文件 {temp_name} 时出错: {e}")
+
+    def _link_abilities(self, items, attr, abilities=None):
+        """
+        把记录中反序列化出来的能力标签副本替换为能力标签列表中的同名对象，
+        使所有记录共享同一个 AbilityTag 实例。
+        """
+        if abilities is None:
+            abilities = self.load_abilities()
+        ability_dict = {ability.name: ability for ability in abilities}
+        for item in items:
+            setattr(item, attr, [ability_dict.get(a.name, a) for a in getattr(item, attr)])
+
+    def _upgrade_legacy(self, collection, path, items, legacy):
+        """
+        旧格式的数据（内嵌完整的能力标签，或记录缺少 id）加载后立即按新格式重写一次，
+        新生成的 id 因此固定下来。
+
+        :param legacy: 原始记录中是否存在旧格式
+        """
+        if legacy:
+            self._forget_saved(collection)
+            self._save_collection(collection, path, items)
+
+    # ----------------- 脏数据跟踪 ----------------- #
+    def _mark_saved(self, collection, items, written=False):
+        """
+        记录列表 items 当前的状态与存储中的一致。
+
+        同一集合可能被多次加载出多个列表，它们都与存储一致；
+        一旦某个列表被写入，其余列表的记录就失效了。
+        """
+        if self.storage and not written:
+            self._track_stored_rows(collection, items)
+        lists = self._saved_state.setdefault(collection, {})
+        if written:
+            lists.clear()
+        lists[id(items)] = (items, [(item, item.version) for item in items])
+        if len(lists) > 8:
+            # 只保留最近加载的几个列表，避免反复加载时无限增长
+            del lists[next(iter(lists))]
+
+    def _forget_saved(self, collection):
+        """丢弃记录的状态，下一次保存该集合时强制整体写入。"""
+        with self._state_lock:
+            self._saved_state.pop(collection, None)
+            for table in ('abilities', 'knowledge_points') if collection == 'abilities' else (collection,):
+                self._stored_rows.pop(table, None)
+
+    def _changed_positions(self, collection, items):
+        """
+        与上次加载/保存时的状态比较。
+
+        :return: None 表示成员或顺序有变化，需要整体写入；
+                 否则返回版本号有变化的记录位置列表（为空表示无需写入）
+        """
+        saved_list, saved = self._saved_state.get(collection, {}).get(id(items), (None, None))
+        if saved_list is not items or len(saved) != len(items):
+            return None
+        changed = []
+        for pos, (item, (saved_item, saved_version)) in enumerate(zip(items, saved)):
+            if item is not saved_item:
+                return None
+            if item.version != saved_version:
+                changed.append(pos)
+        return changed
+
+    def _save_collection(self, collection, path, items):
+        """
+        只在集合自上次加载/保存后有变化时写入。
+        JSON 后端重写该集合的一个文件；SQLite 后端只按主键写入变化的行、删除移除的行。
+
+        记录在调用线程中转换为字典，实际写入交给后台线程，同一集合排队中的写入会被合并。
+        写入之前先记录“已保存”的状态：写入失败时后台线程丢弃该状态，不会被这里的记录覆盖。
+        """
+        with self._state_lock:
+            if self.storage:
+                payload = self._sqlite_payload(collection, items)
+                if payload is None:
+                    return
+                write = self._write_sqlite_payload
+                merge = _merge_row_payloads
+            else:
+                if self._changed_positions(collection, items) == []:
+                    return
+                payload = [item.to_dict() for item in items]
+                write = lambda data: self._write_json(path, data)
+                merge = None
+            self._mark_saved(collection, items, written=True)
+        # 提交在锁外进行：队列满时 submit 会等待后台线程，而后台线程写入失败时需要这把锁
+        self._submit_write(collection, payload, write, merge)
+
+    def migrate_json_to_sqlite(self):
+        """首次启用 SQLite 后端时，把现有 JSON 文件导入数据库。"""
+        collections = [
+            ('tasks', self.tasks_file),
+            ('projects', self.projects_file),
+            ('diary_entries', self.diary_file),
+            ('daily_progress', self.daily_progress_file),
+            ('goals', self.goals_file),
+            ('summaries', self.summaries_file),
+            ('abilities', self.abilities_file),
+        ]
+        for collection, path in collections:
+            try:
+                data = self._read_json_file(path)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"迁移 {path} 时出错: {e}")
+                continue
+            if not data:
+                continue
+            tables = self._split_abilities(data) if collection == 'abilities' else {collection: data}
+            rows = {}
+            for table, records in tables.items():
+                key = TABLES[table]
+                rows[table] = []
+                for pos, record in enumerate(records):
+                    # 旧数据可能缺少 id，这里补上，加载时沿用同一个 id
+                    if not record.get(key):
+                        record = dict(record, **{key: new_id()})
+                    rows[table].append((record[key], pos, record))
+            self.storage.replace_tables(rows)
 
     # ----------------- 目标数据管理 ----------------- #
     def load_goals(self):
         """从 JSON 文件加载目标"""
-        if os.path.exists(self.goals_file):
-            try:
-                with open(self.goals_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return [Goal.from_dict(goal) for goal in data]
-            except json.JSONDecodeError as e:
-                print(f"加载目标时出错: {e}")
-                return []
-            except Exception as e:
-                print(f"加载目标时出错: {e}")
+        try:
+            data = self._read_records('goals', self.goals_file)
+            if data is None:
                 return []
-        return []
+            goals = [Goal.from_dict(goal) for goal in data]
+            self._mark_saved('goals', goals)
+            self._upgrade_legacy('goals', self.goals_file, goals, any('id' not in goal for goal in data))
+            return goals
+        except json.JSONDecodeError as e:
+            print(f"加载目标时出错: {e}")
+            return []
+        except Exception as e:
+            print(f"加载目标时出错: {e}")
+            return []
 
     def save_goals(self, goals):
         """将目标保存到 JSON 文件"""
         try:
-            data = [goal.to_dict() for goal in goals]
-            with open(self.goals_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            self._save_collection('goals', self.goals_file, goals)
         except Exception as e:
             print(f"保存目标时出错: {e}")
 
     # ----------------- 任务数据管理 ----------------- #
-    def load_tasks(self):
-        if os.path.exists(self.tasks_file):
-            try:
-                with open(self.tasks_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return [Task.from_dict(task) for task in data]
-            except json.JSONDecodeError as e:
-                print(f"加载任务时出错: {e}")
-                return []
-            except Exception as e:
-                print(f"加载任务时出错: {e}")
+    def load_tasks(self, abilities=None):
+        """
+        :param abilities: 用于关联的能力标签列表，为 None 时从存储加载
+        """
+        try:
+            data = self._read_records('tasks', self.tasks_file)
+            if data is None:
                 return []
-        return []
+            tasks = [Task.from_dict(task) for task in data]
+            self._link_abilities(tasks, 'abilities', abilities)
+            self.progress_journal.replay('task', tasks)
+            self._mark_saved('tasks', tasks)
+            self._upgrade_legacy('tasks', self.tasks_file, tasks,
+                                 any('id' not in task or _embeds_abilities(task, 'abilities') for task in data))
+            self._load_failed.discard('tasks')
+            return tasks
+        except json.JSONDecodeError as e:
+            print(f"加载任务时出错: {e}")
+            self._load_failed.add('tasks')
+            return []
+        except Exception as e:
+            print(f"加载任务时出错: {e}")
+            self._load_failed.add('tasks')
+            return []
 
     def save_tasks(self, tasks):
+        """
+        :return: 保存是否已提交；后台写入的结果在 flush() 之后用 written('tasks') 确认
+        """
         try:
-            data = [task.to_dict() for task in tasks]
-            with open(self.tasks_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            self._save_collection('tasks', self.tasks_file, tasks)
+            return True
         except Exception as e:
             print(f"保存任务时出错: {e}")
+            return False
+
+    # ----------------- 进度日志 ----------------- #
+    def record_progress(self, item, entry, tasks, projects):
+        """
+        记录一次进度更新：修改内存中的任务/项目，并只向进度日志追加一行，不重写快照文件。
+
+        :param item: Task 或 Project 对象
+        :param entry: (timestamp, description, progress)
+        :param tasks: 当前任务列表，日志需要合并时用于写快照
+        :param projects: 当前项目列表，日志需要合并时用于写快照
+        """
+        kind = 'project' if isinstance(item, Project) else 'task'
+        item.progress_history.append(entry)
+        item.progress = entry[2]
+        try:
+            self.progress_journal.append(kind, item, entry)
+        except Exception as e:
+            print(f"写入进度日志时出错: {e}")
+            # 日志写不进去时退回到整体保存，保证不丢数据
+            self.compact_progress_journal(tasks, projects)
+            return
+        if self.progress_journal.needs_compaction():
+            self.compact_progress_journal(tasks, projects)
+
+    def compact_progress_journal(self, tasks, projects):
+        """
+        把进度日志合并进 tasks/projects 快照，然后清空日志。
+
+        :return: 日志是否已合并并清空；快照没能写入时保留日志，下次启动再合并
+        """
+        if self._load_failed & {'tasks', 'projects'}:
+            # 快照读不出来时 tasks/projects 是不完整的，写回会覆盖原有数据
+            print("任务或项目数据加载失败，暂不合并进度日志")
+            return False
+        # 回放得到的记录在加载时被视为“已保存”，这里必须强制写入
+        self._forget_saved('tasks')
+        self._forget_saved('projects')
+        tasks_saved = self.save_tasks(tasks)
+        projects_saved = self.save_projects(projects)
+        # 快照确认落盘之后才能清空日志
+        self.flush()
+        if not (tasks_saved and projects_saved and self.written('tasks', 'projects')):
+            print("任务或项目快照保存失败，保留进度日志")
+            return False
+        try:
+            self.progress_journal.clear()
+        except Exception as e:
+            print(f"清空进度日志时出错: {e}")
+            return False
+        return True
 
     # ----------------- 每日进度（拱卒）数据管理 ----------------- #
-    def load_daily_progress(self):
-        if os.path.exists(self.daily_progress_file):
-            try:
-                with open(self.daily_progress_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return [DailyProgress.from_dict(entry) for entry in data]
-            except json.JSONDecodeError as e:
-                print(f"加载每日进度时出错: {e}")
-                return []
-            except Exception as e:
-                print(f"加载每日进度时出错: {e}")
+    def load_daily_progress(self, abilities=None):
+        try:
+            data = self._read_records('daily_progress', self.daily_progress_file)
+            if data is None:
                 return []
-        return []
+            daily_progress_list = [DailyProgress.from_dict(entry) for entry in data]
+            self._link_abilities(daily_progress_list, 'tags', abilities)
+            self._mark_saved('daily_progress', daily_progress_list)
+            self._upgrade_legacy('daily_progress', self.daily_progress_file, daily_progress_list,
+                                 any(_embeds_abilities(entry, 'tags') for entry in data))
+            return daily_progress_list
+        except json.JSONDecodeError as e:
+            print(f"加载每日进度时出错: {e}")
+            return []
+        except Exception as e:
+            print(f"加载每日进度时出错: {e}")
+            return []
 
     def save_daily_progress(self, daily_progress_list):
         try:
-            data = [entry.to_dict() for entry in daily_progress_list]
-            with open(self.daily_progress_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            self._save_collection('daily_progress', self.daily_progress_file, daily_progress_list)
         except Exception as e:
             print(f"保存每日进度时出错: {e}")
 
     # ----------------- 日记数据管理 ----------------- #
-    def load_diary_entries(self):
-        if os.path.exists(self.diary_file):
-            try:
-                with open(self.diary_file, 'r', encoding='utf-8') as f:
-                    data = f.read().strip()
-                    if not data:
-                        return []
-                    data = json.loads(data)
-                    return [DiaryEntry.from_dict(entry) for entry in data]
-            except json.JSONDecodeError as e:
-                print(f"加载日记时出错: {e}")
-                return []
-            except Exception as e:
-                print(f"加载日记时出错: {e}")
+    def load_diary_entries(self, abilities=None):
+        try:
+            data = self._read_records('diary_entries', self.diary_file)
+            if data is None:
                 return []
-        return []
+            diary_entries = [DiaryEntry.from_dict(entry) for entry in data]
+            self._link_abilities(diary_entries, 'tags', abilities)
+            self._mark_saved('diary_entries', diary_entries)
+            self._upgrade_legacy('diary_entries', self.diary_file, diary_entries,
+                                 any('id' not in entry or _embeds_abilities(entry, 'tags') for entry in data))
+            return diary_entries
+        except json.JSONDecodeError as e:
+            print(f"加载日记时出错: {e}")
+            return []
+        except Exception as e:
+            print(f"加载日记时出错: {e}")
+            return []
 
     def save_diary_entries(self, diary_entries):
         try:
-            data = [entry.to_dict() for entry in diary_entries]
-            with open(self.diary_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            self._save_collection('diary_entries', self.diary_file, diary_entries)
         except Exception as e:
             print(f"保存日记时出错: {e}")
 
     # ----------------- 阶段性总结数据管理 ----------------- #
     def load_summaries(self):
-        if os.path.exists(self.summaries_file):
-            try:
-                with open(self.summaries_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return [PeriodicSummary.from_dict(summary) for summary in data]
-            except json.JSONDecodeError as e:
-                print(f"加载阶段性总结时出错: {e}")
-                return []
-            except Exception as e:
-                print(f"加载阶段性总结时出错: {e}")
+        try:
+            data = self._read_records('summaries', self.summaries_file)
+            if data is None:
                 return []
-        return []
+            summaries = [PeriodicSummary.from_dict(summary) for summary in data]
+            self._mark_saved('summaries', summaries)
+            self._upgrade_legacy('summaries', self.summaries_file, summaries, any('id' not in summary for summary in data))
+            return summaries
+        except json.JSONDecodeError as e:
+            print(f"加载阶段性总结时出错: {e}")
+            return []
+        except Exception as e:
+            print(f"加载阶段性总结时出错: {e}")
+            return []
 
     def save_summaries(self, summaries):
         try:
-            data = [summary.to_dict() for summary in summaries]
-            with open(self.summaries_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            self._save_collection('summaries', self.summaries_file, summaries)
         except Exception as e:
             print(f"保存阶段性总结时出错: {e}")
 
     # ----------------- 项目数据管理 ----------------- #
-    def load_projects(self):
-        if os.path.exists(self.projects_file):
-            try:
-                with open(self.projects_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    projects = [Project.from_dict(project) for project in data]
-                    # 关联能力标签
-                    ability_dict = {ability.name: ability for ability in self.load_abilities()}
-                    for project in projects:
-                        project.abilities = [ability_dict.get(a.name, AbilityTag(a.name)) for a in project.abilities]
-                    return projects
-            except json.JSONDecodeError as e:
-                print(f"加载项目时出错: {e}")
-                return []
-            except Exception as e:
-                print(f"加载项目时出错: {e}")
+    def load_projects(self, abilities=None):
+        """
+        :param abilities: 用于关联的能力标签列表，为 None 时从存储加载
+        """
+        try:
+            data = self._read_records('projects', self.projects_file)
+            if data is None:
                 return []
-        return []
+            projects = [Project.from_dict(project) for project in data]
+            # 关联能力标签
+            self._link_abilities(projects, 'abilities', abilities)
+            self.progress_journal.replay('project', projects)
+            self._mark_saved('projects', projects)
+            self._upgrade_legacy('projects', self.projects_file, projects,
+                                 any('id' not in project or _embeds_abilities(project, 'abilities') for project in data))
+            self._load_failed.discard('projects')
+            return projects
+        except json.JSONDecodeError as e:
+            print(f"加载项目时出错: {e}")
+            self._load_failed.add('projects')
+            return []
+        except Exception as e:
+            print(f"加载项目时出错: {e}")
+            self._load_failed.add('projects')
+            return []
 
     def save_projects(self, projects):
+        """
+        :return: 保存是否已提交；后台写入的结果在 flush() 之后用 written('projects') 确认
+        """
         try:
             # 调试信息：检查每个项目的能力标签是否为 AbilityTag 对象
             for project in projects:
@@ -167,75 +651,123 @@ class DataManager:
                         print(f"项目 '{project.name}' 的能力标签 '{ability}' 不是 AbilityTag 对象")
                         raise TypeError(f"能力标签必须是 AbilityTag 对象，但得到的是 '{type(ability)}'")
 
-            data = [project.to_dict() for project in projects]
-
-            # 使用临时文件保存数据
-            with tempfile.NamedTemporaryFile('w', delete=False, encoding='utf-8') as tf:
-                json.dump(data, tf, ensure_ascii=False, indent=4)
-                temp_name = tf.name
-
-            # 替换原文件
-            shutil.move(temp_name, self.projects_file)
+            self._save_collection('projects', self.projects_file, projects)
+            return True
         except TypeError as e:
             print(f"保存项目时出错: {e}")
+            return False
         except Exception as e:
             print(f"保存项目时出错: {e}")
+            return False
 
     # ----------------- 能力标签数据管理 ----------------- #
     def load_abilities(self):
-        if os.path.exists(self.abilities_file):
-            try:
-                with open(self.abilities_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return [AbilityTag.from_dict(ability) for ability in data]
-            except json.JSONDecodeError as e:
-                print(f"加载能力标签时出错: {e}")
-                return [AbilityTag("无")]
-            except Exception as e:
-                print(f"加载能力标签时出错: {e}")
+        try:
+            data = self._read_records('abilities', self.abilities_file)
+            if data is None:
                 return [AbilityTag("无")]
-        return [AbilityTag("无")]
+            abilities = [AbilityTag.from_dict(ability) for ability in data]
+            self._mark_saved('abilities', abilities)
+            self._upgrade_legacy('abilities', self.abilities_file, abilities,
+                                 any('id' not in kp for ability in data for kp in ability.get('knowledge_points', [])))
+            return abilities
+        except json.JSONDecodeError as e:
+            print(f"加载能力标签时出错: {e}")
+            return [AbilityTag("无")]
+        except Exception as e:
+            print(f"加载能力标签时出错: {e}")
+            return [AbilityTag("无")]
 
     def save_abilities(self, abilities):
         try:
-            data = [ability.to_dict() for ability in abilities]
-            with open(self.abilities_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            self._save_collection('abilities', self.abilities_file, abilities)
         except Exception as e:
             print(f"保存能力标签时出错: {e}")
 
-    # ----------------- 自动同步每日进度 ----------------- #
-    def synchronize_daily_progress(self):
+    # ----------------- 回忆记录 ----------------- #
+    def get_recall_log(self):
+        """知识点回忆事件日志，第一次使用时从文件读入。"""
+        if self._recall_log is None:
+            self._recall_log = RecallLog(self.recall_log_file)
+        return self._recall_log
+
+    def record_recalls(self, events):
         """
-        根据任务的进度历史自动同步每日进度。
+        记录一批回忆事件。
+
+        :param events: [(知识点 id, 日期 date, 评分, 间隔天数)]
         """
-        tasks = self.load_tasks()
-        daily_progress_list = self.load_daily_progress()
+        try:
+            self.get_recall_log().append_many(events)
+        except Exception as e:
+            print(f"写入回忆记录时出错: {e}")
+
+    # ----------------- 全文检索索引 ----------------- #
+    def load_search_index(self):
+        """读取持久化的检索索引（字典）；不存在或已损坏时返回 None，由调用方重建。"""
+        self.flush()
+        try:
+            return self._read_json_file(self.search_index_file) or None
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"加载检索索引时出错: {e}")
+            return None
+
+    def save_search_index(self, data):
+        """
+        :param data: SearchIndex.to_dict() 的结果
+        """
+        try:
+            self._submit_write('search_index', data, lambda d: self._write_json(self.search_index_file, d))
+        except Exception as e:
+            print(f"保存检索索引时出错: {e}")
 
-        # 使用 defaultdict 聚合每一天的任务完成数
-        progress_counter = defaultdict(int)
+    # ----------------- 自动同步每日进度 ----------------- #
+    def synchronize_daily_progress(self, tasks=None, daily_progress_list=None, projects=None):
+        """
+        根据任务和项目的进度历史自动同步每日进度。
 
-        for task in tasks:
-            for entry in task.progress_history:
-                timestamp, description, progress = entry
-                date_str = timestamp.split(' ')[0]  # 提取日期部分
-                progress_counter[date_str] += 1  # 假设每次进度更新计为一个完成任务
+        有进度更新的日期都有一条每日进度，tasks_completed 等于当天进度达到 100% 的任务和项目数
+        （每个只计一次）。计数由 progress_index 增量维护，这里只更新有变化的日期，重复调用结果不变。
 
-        # 将聚合结果与现有的每日进度列表对比，并更新或添加条目
-        existing_dates = {dp.progress_date for dp in daily_progress_list}
+        :param tasks: 内存中的任务列表，为 None 时从存储加载
+        :param daily_progress_list: 内存中的每日进度列表，为 None 时从存储加载
+        :param projects: 内存中的项目列表，为 None 时从存储加载
+        """
+        if tasks is None:
+            tasks = self.load_tasks()
+        if projects is None:
+            projects = self.load_projects()
+        if daily_progress_list is None:
+            daily_progress_list = self.load_daily_progress()
 
-        for date_str, count in progress_counter.items():
-            if date_str in existing_dates:
-                # 更新已存在的条目
-                dp = next(dp for dp in daily_progress_list if dp.progress_date == date_str)
-                dp.tasks_completed += count  # 叠加已完成任务数
-            else:
-                # 添加新的条目
-                new_dp = DailyProgress(progress_date=date_str, tasks_completed=count)
-                daily_progress_list.append(new_dp)
+        changed_dates = self.progress_index.sync(tasks + projects)
+
+        # 日期 -> DailyProgress 的索引跟随列表缓存；换了列表就要核对所有日期
+        if self._daily_progress_by_date[0] is not daily_progress_list or \
+                len(self._daily_progress_by_date[1]) != len(daily_progress_list):
+            by_date = {dp.progress_date: dp for dp in daily_progress_list}
+            self._daily_progress_by_date = (daily_progress_list, by_date)
+            changed_dates = set(self.progress_index.counts) | set(by_date)
+        by_date = self._daily_progress_by_date[1]
+
+        modified = False
+        for date_str in changed_dates:
+            count = len(self.progress_index.completed.get(date_str, ()))
+            dp = by_date.get(date_str)
+            if dp is None:
+                if self.progress_index.counts.get(date_str):
+                    # 添加新的条目
+                    dp = DailyProgress(progress_date=date_str, tasks_completed=count)
+                    daily_progress_list.append(dp)
+                    by_date[date_str] = dp
+                    modified = True
+            elif dp.tasks_completed != count:
+                dp.tasks_completed = count
+                modified = True
 
         # 保存更新后的每日进度列表
-        self.save_daily_progress(daily_progress_list)
+        if modified:
+            self.save_daily_progress(daily_progress_list)
 
     # ----------------- 综合数据管理 ----------------- #
     def load_all_data(self):
@@ -266,7 +798,7 @@ class DataManager:
 
     def save_all_data(self, tasks, diary_entries, summaries, projects, abilities, daily_progress, goals):
         """
-        保存所有类型的数据。
+        保存所有类型的数据。只有自上次加载/保存后发生变化的集合才会被写入。
         """
         self.save_tasks(tasks)
         self.save_diary_entries(diary_entries)
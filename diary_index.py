@@ -0,0 +1,53 @@
+# diary_index.py
+
+from bisect import bisect_left, bisect_right, insort
+from calendar import monthrange
+from datetime import date
+
+
+class DiaryIndex:
+    """
+    按日期索引的日记：日期 -> DiaryEntry 的字典，加上有序的日期列表。
+
+    按天查找是 O(1)，按月或任意日期区间查找用二分定位，只触及区间内的日记。
+    """
+
+    def __init__(self, entries):
+        """
+        :param entries: DiaryEntry 列表
+        """
+        self.rebuild(entries)
+
+    def rebuild(self, entries):
+        self.by_date = {}
+        for entry in entries:
+            if entry.entry_date:
+                # 同一天有多篇时保留最早添加的一篇，与原来线性查找的结果一致
+                self.by_date.setdefault(entry.entry_date, entry)
+        self.dates = sorted(self.by_date)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def get(self, day):
+        """
+        :param day: datetime.date
+        :return: 该日期的 DiaryEntry，没有时返回 None
+        """
+        return self.by_date.get(day)
+
+    def add(self, entry):
+        if not entry.entry_date or entry.entry_date in self.by_date:
+            return
+        self.by_date[entry.entry_date] = entry
+        insort(self.dates, entry.entry_date)
+
+    def between(self, start, end):
+        """返回 start <= 日期 <= end 的日记，按日期排列。"""
+        low = bisect_left(self.dates, start)
+        high = bisect_right(self.dates, end)
+        return [self.by_date[day] for day in self.dates[low:high]]
+
+    def month(self, year, month):
+        """返回某年某月的日记，按日期排列。"""
+        return self.between(date(year, month, 1), date(year, month, monthrange(year, month)[1]))
@@ -1,6 +1,8 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk
 from data_manager import DataManager
+from repository import Repository
 from views.tasks_view import TasksView
 from views.diary_view import DiaryView
 from views.summary_view import SummaryView
@@ -12,6 +14,7 @@ from views.goals_view import GoalsView  # 导入 GoalsView
 from views.recall_view import RecallView
 from models import AbilityTag
 from views.pomodoro_view import PomodoroView  # 导入 PomodoroView
+from views.search_view import SearchView
 
 
 def configure_styles():
@@ -45,7 +48,17 @@ def configure_styles():
     style.map("TEntry", foreground=[("focus", "#333333")])
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="上岸")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json",
+                        help="数据存储后端：json（默认）或 sqlite")
+    parser.add_argument("--db-file", default="todo.db", help="SQLite 后端使用的数据库文件")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     # 初始化主窗口
     root = tk.Tk()
     root.title("上岸")
@@ -58,10 +71,13 @@ def main():
         print(f"无法加载图标文件: {e}")
 
     # 初始化数据管理器
-    data_manager = DataManager()
+    data_manager = DataManager(backend=args.backend, db_file=args.db_file)
+
+    # 所有视图共享同一个数据仓库：每个集合只加载一次，修改后通知其它视图
+    repository = Repository(data_manager)
 
     # 加载能力标签
-    abilities = data_manager.load_abilities()
+    abilities = repository.load_abilities()
 
     # 配置全局样式
     configure_styles()
@@ -79,59 +95,71 @@ def main():
     # 创建“任务”标签页
     tasks_frame = ttk.Frame(notebook)
     notebook.add(tasks_frame, text='运筹')
-    TasksView(tasks_frame, data_manager, abilities)
+    TasksView(tasks_frame, repository, abilities)
 
     # 创建“拱卒”标签页
     daily_progress_frame = ttk.Frame(notebook)
     notebook.add(daily_progress_frame, text='拱卒')
-    DailyProgressView(daily_progress_frame, data_manager, abilities)
+    DailyProgressView(daily_progress_frame, repository, abilities)
 
     # 创建“日记”标签页
     diary_frame = ttk.Frame(notebook)
     notebook.add(diary_frame, text='拾遗')
-    DiaryView(diary_frame, data_manager, abilities)
+    DiaryView(diary_frame, repository, abilities)
 
     # 创建“阶段性总结”标签页
     summary_frame = ttk.Frame(notebook)
     notebook.add(summary_frame, text='回首')
-    SummaryView(summary_frame, data_manager)
+    SummaryView(summary_frame, repository)
 
     # 创建“能力标签”标签页
     abilities_frame = ttk.Frame(notebook)
     notebook.add(abilities_frame, text='宝物')
-    AbilitiesView(abilities_frame, data_manager)
+    AbilitiesView(abilities_frame, repository)
 
     # 创建“回忆知识点”标签页
     recall_frame = ttk.Frame(notebook)
     notebook.add(recall_frame, text="峥嵘")
-    RecallView(recall_frame,data_manager)
+    RecallView(recall_frame, repository)
 
     # 创建“项目”标签页
     projects_frame = ttk.Frame(notebook)
     notebook.add(projects_frame, text='高楼')
-    ProjectsView(projects_frame, data_manager, abilities)
+    ProjectsView(projects_frame, repository, abilities)
 
     # 创建“目标”标签页
     goals_frame = ttk.Frame(notebook)
     notebook.add(goals_frame, text="插旗")
-    GoalsView(goals_frame, data_manager)
+    GoalsView(goals_frame, repository)
 
     # 创建“数据分析”标签页
     analysis_frame = ttk.Frame(notebook)
     notebook.add(analysis_frame, text="鉴证")
-    AnalysisView(analysis_frame, data_manager, abilities)
+    AnalysisView(analysis_frame, repository, abilities)
 
     # 创建“番茄钟”标签页
     pomodoro_frame = ttk.Frame(notebook)
     notebook.add(pomodoro_frame, text="心流")
     PomodoroView(pomodoro_frame)
 
+    # 创建“全文检索”标签页
+    search_frame = ttk.Frame(notebook)
+    notebook.add(search_frame, text="寻踪")
+    SearchView(search_frame, repository)
+
     # 页脚
     footer = tk.Frame(root, bg="#4caf50", height=30)
     footer.pack(fill="x", side="bottom")
     footer_label = tk.Label(footer, text="© 2024 Leyan Cai", bg="#4caf50", fg="white", font=("Microsoft YaHei", 10))
     footer_label.pack(pady=5)
 
+    # 关闭窗口前写完后台排队中的保存（包括检索索引）
+    def on_close():
+        repository.flush()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
     # 启动主循环
     root.mainloop()
 
@@ -1,36 +1,120 @@
 # models.py
+import sys
+import uuid
+from functools import lru_cache
 
 
-class KnowledgePoint:
-    def __init__(self, content, learned=False, last_recall=None, next_recall=None):
+def new_id():
+    """生成紧凑且稳定的记录 ID（12 位十六进制字符串）。"""
+    return uuid.uuid4().hex[:12]
+
+
+def _intern(value):
+    """能力名称、分类、日期等字符串在大量记录中重复出现，驻留后只保留一份。"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TrackedModel:
+    """
+    带修改版本号的模型基类。
+
+    对公开属性赋值时 version 自动加一，DataManager 据此只写入有变化的数据。
+    原地修改列表属性（例如 progress_history.append）后应调用 touch()。
+
+    模型类都声明 __slots__，实例不带 __dict__，大量记录常驻内存时更省空间。
+    """
+    __slots__ = ('_version',)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'):
+            self.touch()
+
+    def touch(self):
+        """标记对象已被修改。"""
+        object.__setattr__(self, '_version', getattr(self, '_version', 0) + 1)
+
+    @property
+    def version(self):
+        return getattr(self, '_version', 0)
+
+
+class KnowledgePoint(TrackedModel):
+    __slots__ = ('id', 'content', 'learned', 'last_recall', 'next_recall', 'ease', 'repetitions', 'lapses')
+
+    DEFAULT_EASE = 2.5
+
+    def __init__(self, content, learned=False, last_recall=None, next_recall=None, id=None,
+                 ease=DEFAULT_EASE, repetitions=0, lapses=0):
+        self.id = id or new_id()
         self.content = content
         self.learned = learned
         self.last_recall = last_recall  # 字符串格式：YYYY-MM-DD 或 None
         self.next_recall = next_recall  # 字符串格式：YYYY-MM-DD 或 None
+        self.ease = ease  # 难度系数（SM-2 的 E-Factor），不低于 1.3
+        self.repetitions = repetitions  # 连续回忆成功的次数
+        self.lapses = lapses  # 累计遗忘的次数
 
     def to_dict(self):
         return {
+            'id': self.id,
             'content': self.content,
             'learned': self.learned,
             'last_recall': self.last_recall,
-            'next_recall': self.next_recall
+            'next_recall': self.next_recall,
+            'ease': self.ease,
+            'repetitions': self.repetitions,
+            'lapses': self.lapses
         }
 
     @staticmethod
     def from_dict(data):
+        repetitions = data.get('repetitions')
+        if repetitions is None:
+            repetitions = KnowledgePoint._legacy_repetitions(data)
         return KnowledgePoint(
             content=data['content'],
             learned=data.get('learned', False),
-            last_recall=data.get('last_recall'),
-            next_recall=data.get('next_recall')
+            last_recall=_intern(data.get('last_recall')),
+            next_recall=_intern(data.get('next_recall')),
+            id=data.get('id'),
+            ease=data.get('ease', KnowledgePoint.DEFAULT_EASE),
+            repetitions=repetitions,
+            lapses=data.get('lapses', 0)
         )
 
-class AbilityTag:
+    @staticmethod
+    def _legacy_repetitions(data):
+        """
+        旧数据没有 SM-2 的连续成功次数，按已有的回忆间隔推出：
+        间隔达到 6 天的视为已过前两次固定间隔，之后按难度系数放大，原有的复习进度得以保留。
+        """
+        if not data.get('learned'):
+            return 0
+        interval = recall_interval(data.get('last_recall'), data.get('next_recall'))
+        if interval >= 6:
+            return 2
+        return 1 if interval > 1 else 0
+
+
+class AbilityTag(TrackedModel):
+    __slots__ = ('name', 'parent', 'knowledge_points')
+
     def __init__(self, name, parent=None, knowledge_points=None):
         self.name = name
         self.parent = parent  # 父能力标签名称，默认为 None
         self.knowledge_points = knowledge_points if knowledge_points else []  # List of KnowledgePoint
 
+    @property
+    def own_version(self):
+        """只计能力标签自身字段的修改，不含知识点。"""
+        return getattr(self, '_version', 0)
+
+    @property
+    def version(self):
+        # 知识点的修改同样算作能力标签的修改
+        return (self.own_version, tuple(kp.version for kp in self.knowledge_points))
+
     def to_dict(self):
         return {
             'name': self.name,
@@ -42,11 +126,26 @@ class AbilityTag:
     def from_dict(data):
         knowledge_points_data = data.get('knowledge_points', [])
         knowledge_points = [KnowledgePoint.from_dict(kp) for kp in knowledge_points_data]
-        return AbilityTag(name=data['name'], parent=data.get('parent'), knowledge_points=knowledge_points)
+        return AbilityTag(name=_intern(data['name']), parent=_intern(data.get('parent')), knowledge_points=knowledge_points)
+
 
+def ability_ref_from_data(data):
+    """
+    把序列化的能力标签引用还原为 AbilityTag。
 
-class Task:
-    def __init__(self, name, due_date, interest=None, description='', abilities=None, progress=0):
+    新格式只保存能力名称，此时返回一个占位对象，加载后由 DataManager 换成能力标签表里的同名对象；
+    旧格式内嵌完整的能力标签字典，仍按原样解析。
+    """
+    if isinstance(data, dict):
+        return AbilityTag.from_dict(data)
+    return AbilityTag(_intern(data))
+
+
+class Task(TrackedModel):
+    __slots__ = ('id', 'name', 'due_date', 'interest', 'description', 'abilities', 'progress', 'progress_history')
+
+    def __init__(self, name, due_date, interest=None, description='', abilities=None, progress=0, id=None):
+        self.id = id or new_id()
         self.name = name
         self.due_date = due_date  # 字符串格式：YYYY-MM-DD
         self.interest = interest  # 整数，1-5，默认为 None
@@ -57,13 +156,14 @@ class Task:
 
     def to_dict(self):
         return {
+            'id': self.id,
             'name': self.name,
             'due_date': self.due_date,
             'interest': self.interest,
             'description': self.description,
-            'abilities': [ability.to_dict() for ability in self.abilities],  # 确保这是一个列表
+            'abilities': [ability.name for ability in self.abilities],  # 只保存能力名称，加载时按名称关联
             'progress': self.progress,
-            'progress_history': self.progress_history
+            'progress_history': list(self.progress_history)
         }
 
     @staticmethod
@@ -74,32 +174,82 @@ class Task:
         # 处理旧格式，abilities_data 是单个对象的情况
         if isinstance(abilities_data, dict):
             abilities.append(AbilityTag.from_dict(abilities_data))
-        # 处理新格式，abilities_data 是列表的情况
+        # 处理新格式，abilities_data 是列表的情况（元素为能力名称或旧的内嵌字典）
         elif isinstance(abilities_data, list):
-            abilities = [AbilityTag.from_dict(ability_data) for ability_data in abilities_data]
+            abilities = [ability_ref_from_data(ability_data) for ability_data in abilities_data]
         # abilities_data 为空或为 None 的情况
         else:
             abilities = []
 
         task = Task(
             name=data['name'],
-            due_date=data['due_date'],
+            due_date=_intern(data['due_date']),
             interest=data.get('interest', None),
             description=data.get('description', ''),
             abilities=abilities,  # 这里确保 abilities 是一个列表
-            progress=data.get('progress', 0)
+            progress=data.get('progress', 0),
+            id=data.get('id')
         )
-        task.progress_history = data.get('progress_history', [])
+        task.progress_history = [tuple(entry) for entry in data.get('progress_history', [])]
         return task
 
 # models.py
 from datetime import datetime, date
 
-class DiaryEntry:
-    def __init__(self, entry_date, summary, category='', tags=None, links=None):
+@lru_cache(maxsize=4096)
+def _parse_date(date_str):
+    """解析 YYYY-MM-DD；同一天的记录共享同一个 date 对象。"""
+    return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+
+MISSING_DATE_ORDINAL = date.max.toordinal() + 1  # 缺失或无法解析的日期排在所有日期之后
+
+
+def date_ordinal(value):
+    """日期（date 对象或 YYYY-MM-DD 字符串）的序数，用作排序键。"""
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return _parse_date(value).toordinal()
+    except (TypeError, ValueError):
+        return MISSING_DATE_ORDINAL
+
+
+def recall_interval(last_recall, next_recall):
+    """上次与下次回忆日期之间的天数；缺少日期时为 1。"""
+    last = date_ordinal(last_recall)
+    following = date_ordinal(next_recall)
+    if MISSING_DATE_ORDINAL in (last, following):
+        return 1
+    return max(following - last, 1)
+
+
+# 可排序字段 -> 取排序键的函数；键都是整数，降序时取相反数即可
+SORT_KEYS = {
+    'due_date': lambda item: date_ordinal(item.due_date),
+    'interest': lambda item: item.interest or 0,
+    'progress': lambda item: item.progress or 0,
+}
+
+
+def sort_key(fields):
+    """
+    返回多列排序的键函数，list.sort 对每个对象只调用一次。
+
+    :param fields: [(字段名, 是否降序)]，按优先级排列，字段名为 SORT_KEYS 中的键
+    """
+    getters = [(SORT_KEYS[field], -1 if reverse else 1) for field, reverse in fields]
+    return lambda item: tuple(sign * getter(item) for getter, sign in getters)
+
+
+class DiaryEntry(TrackedModel):
+    __slots__ = ('id', 'entry_date', 'summary', 'category', 'tags', 'links')
+
+    def __init__(self, entry_date, summary, category='', tags=None, links=None, id=None):
+        self.id = id or new_id()
         if isinstance(entry_date, str):
             try:
-                self.entry_date = datetime.strptime(entry_date, '%Y-%m-%d').date()
+                self.entry_date = _parse_date(entry_date)
             except ValueError as e:
                 print(f"错误：无法解析日期 '{entry_date}'，错误信息：{e}")
                 self.entry_date = None
@@ -114,20 +264,21 @@ class DiaryEntry:
 
     def to_dict(self):
         return {
+            'id': self.id,
             'entry_date': self.entry_date.strftime('%Y-%m-%d') if self.entry_date else '',
             'summary': self.summary,
             'category': self.category,
-            'tags': [tag.to_dict() for tag in self.tags],
-            'links': self.links
+            'tags': [tag.name for tag in self.tags],
+            'links': list(self.links)
         }
 
     @staticmethod
     def from_dict(data):
-        tags = [AbilityTag.from_dict(tag) for tag in data.get('tags', [])]
+        tags = [ability_ref_from_data(tag) for tag in data.get('tags', [])]
         entry_date_str = data.get('entry_date', '')
         if entry_date_str:
             try:
-                entry_date = datetime.strptime(entry_date_str, '%Y-%m-%d').date()
+                entry_date = _parse_date(entry_date_str)
             except ValueError as e:
                 print(f"错误：无法解析日期 '{entry_date_str}'，错误信息：{e}")
                 entry_date = None
@@ -136,21 +287,26 @@ class DiaryEntry:
         return DiaryEntry(
             entry_date=entry_date,
             summary=data.get('summary', ''),
-            category=data.get('category', ''),
+            category=_intern(data.get('category', '')),
             tags=tags,
-            links=data.get('links', [])
+            links=data.get('links', []),
+            id=data.get('id')
         )
 
 
 
-class PeriodicSummary:
-    def __init__(self, title, content, summary_date):
+class PeriodicSummary(TrackedModel):
+    __slots__ = ('id', 'title', 'content', 'summary_date')
+
+    def __init__(self, title, content, summary_date, id=None):
+        self.id = id or new_id()
         self.title = title
         self.content = content
         self.summary_date = summary_date  # 字符串格式：YYYY-MM-DD
 
     def to_dict(self):
         return {
+            'id': self.id,
             'title': self.title,
             'content': self.content,
             'summary_date': self.summary_date
@@ -161,12 +317,16 @@ class PeriodicSummary:
         return PeriodicSummary(
             title=data['title'],
             content=data['content'],
-            summary_date=data['summary_date']
+            summary_date=_intern(data['summary_date']),
+            id=data.get('id')
         )
 
 
-class Project:
-    def __init__(self, name, due_date, abilities, description, progress=0, interest=None, progress_history=None):
+class Project(TrackedModel):
+    __slots__ = ('id', 'name', 'due_date', 'abilities', 'description', 'progress', 'interest', 'progress_history')
+
+    def __init__(self, name, due_date, abilities, description, progress=0, interest=None, progress_history=None, id=None):
+        self.id = id or new_id()
         self.name = name
         self.due_date = due_date  # 字符串格式：YYYY-MM-DD
         self.abilities = abilities  # List of AbilityTag objects
@@ -177,12 +337,13 @@ class Project:
 
     def to_dict(self):
         data = {
+            'id': self.id,
             'name': self.name,
             'due_date': self.due_date,
-            'abilities': [ability.to_dict() for ability in self.abilities],
+            'abilities': [ability.name for ability in self.abilities],
             'description': self.description,
             'progress': self.progress,
-            'progress_history': self.progress_history
+            'progress_history': list(self.progress_history)
         }
         if self.interest is not None:
             data['interest'] = self.interest
@@ -190,19 +351,22 @@ class Project:
 
     @staticmethod
     def from_dict(data):
-        abilities = [AbilityTag.from_dict(a) for a in data.get('abilities', [])]
+        abilities = [ability_ref_from_data(a) for a in data.get('abilities', [])]
         interest = data.get('interest')  # 可能为 None
-        progress_history = data.get('progress_history', [])  # 可能为空列表
+        progress_history = [tuple(entry) for entry in data.get('progress_history', [])]  # 可能为空列表
         return Project(
             name=data['name'],
-            due_date=data['due_date'],
+            due_date=_intern(data['due_date']),
             abilities=abilities,
             description=data['description'],
             progress=data.get('progress', 0),
             interest=interest,
-            progress_history=progress_history
+            progress_history=progress_history,
+            id=data.get('id')
         )
-class DailyProgress:
+class DailyProgress(TrackedModel):
+    __slots__ = ('progress_date', 'tasks_completed', 'notes', 'tags')
+
     def __init__(self, progress_date, tasks_completed=0, notes='', tags=None):
         """
         :param progress_date: 日期，字符串格式 YYYY-MM-DD
@@ -220,15 +384,15 @@ class DailyProgress:
             'progress_date': self.progress_date,
             'tasks_completed': self.tasks_completed,
             'notes': self.notes,
-            'tags': [tag.to_dict() for tag in self.tags]
+            'tags': [tag.name for tag in self.tags]
         }
 
     @staticmethod
     def from_dict(data):
         tags_data = data.get('tags', [])
-        tags = [AbilityTag.from_dict(tag_data) for tag_data in tags_data]
+        tags = [ability_ref_from_data(tag_data) for tag_data in tags_data]
         return DailyProgress(
-            progress_date=data['progress_date'],
+            progress_date=_intern(data['progress_date']),
             tasks_completed=data.get('tasks_completed', 0),
             notes=data.get('notes', ''),
             tags=tags
@@ -236,14 +400,18 @@ class DailyProgress:
 
         # models.py
 
-class Goal:
-    def __init__(self, text, due_date, completed=False):
+class Goal(TrackedModel):
+    __slots__ = ('id', 'text', 'due_date', 'completed')
+
+    def __init__(self, text, due_date, completed=False, id=None):
+        self.id = id or new_id()
         self.text = text
         self.due_date = due_date
         self.completed = completed
 
     def to_dict(self):
         return {
+            "id": self.id,
             "text": self.text,
             "due_date": self.due_date,
             "completed": self.completed
@@ -253,6 +421,7 @@ class Goal:
     def from_dict(cls, data):
         return cls(
             text=data.get("text", ""),
-            due_date=data.get("due_date", ""),
-            completed=data.get("completed", False)
+            due_date=_intern(data.get("due_date", "")),
+            completed=data.get("completed", False),
+            id=data.get("id")
         )
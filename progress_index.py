@@ -0,0 +1,91 @@
+# progress_index.py
+
+from collections import defaultdict
+
+
+def entry_date(entry):
+    """进度记录 (timestamp, description, progress) 所在的日期字符串 YYYY-MM-DD。"""
+    return entry[0].split(' ')[0]
+
+
+class ProgressIndex:
+    """
+    按日期聚合的进度事件索引。
+
+    记录每个对象已经计入的进度历史条数，sync() 只处理新增的记录和被删除的对象，
+    因此结果只取决于当前的进度历史：重复调用不会重复计数，每个新事件的代价是 O(1)。
+
+    除了每天的更新次数，还记录每天进度达到 100% 的对象，completed_on() 直接按日期查出。
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)  # 日期 -> 当天的进度更新次数
+        self.completed = defaultdict(dict)  # 日期 -> {id(item): [item, 当天达到 100% 的记录数]}
+        self._tracked = {}  # id(item) -> [item, 已计入的历史条数]
+        self._changed_dates = set()
+
+    def _count(self, item, entry, delta):
+        date_str = entry_date(entry)
+        self.counts[date_str] += delta
+        self._changed_dates.add(date_str)
+        if entry[2] == 100:
+            completed = self.completed[date_str]
+            slot = completed.setdefault(id(item), [item, 0])
+            slot[1] += delta
+            if slot[1] <= 0:
+                del completed[id(item)]
+                if not completed:
+                    del self.completed[date_str]
+
+    def _untrack(self, key):
+        item, counted = self._tracked.pop(key)
+        for entry in item.progress_history[:counted]:
+            self._count(item, entry, -1)
+
+    def completed_on(self, date_str):
+        """
+        某天进度达到 100% 的对象，每个对象只出现一次。
+
+        :param date_str: 日期字符串 YYYY-MM-DD
+        :return: Task/Project 列表，按首次计入索引的顺序排列
+        """
+        return [item for item, _ in self.completed.get(date_str, {}).values()]
+
+    def sync(self, items):
+        """
+        使索引与 items 的进度历史保持一致。
+
+        :param items: Task/Project 列表
+        :return: 计数发生变化的日期集合
+        """
+        current = {id(item): item for item in items}
+        for key in [key for key in self._tracked if key not in current]:
+            self._untrack(key)
+
+        for key, item in current.items():
+            tracked = self._tracked.get(key)
+            if tracked is None:
+                tracked = self._tracked[key] = [item, 0]
+            history = item.progress_history
+            if len(history) < tracked[1]:
+                # 历史被截断，无法知道删掉的是哪些记录，只能整体重建
+                return self.rebuild(items)
+            for entry in history[tracked[1]:]:
+                self._count(item, entry, 1)
+            tracked[1] = len(history)
+
+        changed, self._changed_dates = self._changed_dates, set()
+        return changed
+
+    def rebuild(self, items):
+        """
+        丢弃已有计数，按 items 重新建立索引。
+
+        :return: 重建前后涉及的所有日期
+        """
+        changed = set(self.counts) | self._changed_dates
+        self.counts.clear()
+        self.completed.clear()
+        self._tracked.clear()
+        self._changed_dates = set()
+        return changed | self.sync(items)
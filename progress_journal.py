@@ -0,0 +1,108 @@
+# progress_journal.py
+
+import json
+import os
+
+
+class ProgressJournal:
+    """
+    进度更新的追加式日志（JSONL，每行一个事件）。
+
+    每次进度更新只追加一行并 fsync，而不是重写整个 tasks.json / projects.json。
+    加载时把日志回放到快照上，启动时或日志超过阈值时再合并进快照并清空日志。
+    """
+
+    def __init__(self, path, compact_threshold=200):
+        """
+        :param path: 日志文件路径
+        :param compact_threshold: 日志条数达到该值时应合并进快照
+        """
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._file = None
+        self.count = sum(1 for _ in self.read())
+
+    def _open(self):
+        if self._file is None:
+            # 上次写入若被中断，最后一行可能不完整，先补一个换行避免与新事件粘连
+            needs_newline = False
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b'\n'
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if needs_newline:
+                self._file.write('\n')
+        return self._file
+
+    def append(self, kind, item, entry):
+        """
+        追加一个进度事件。
+
+        :param kind: 'task' 或 'project'
+        :param item: Task 或 Project 对象，按 id 记录（名称仅作兼容）
+        :param entry: (timestamp, description, progress)
+        """
+        timestamp, description, progress = entry
+        event = {'kind': kind, 'id': item.id, 'name': item.name, 'timestamp': timestamp,
+                 'description': description, 'progress': progress}
+        f = self._open()
+        f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+        self.count += 1
+
+    def read(self):
+        """按写入顺序返回所有事件，跳过崩溃时写了一半的行。"""
+        if not os.path.exists(self.path):
+            return []
+        events = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return events
+
+    def needs_compaction(self):
+        return self.count >= self.compact_threshold
+
+    def clear(self):
+        """快照已包含所有事件后清空日志。"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.count = 0
+
+    def replay(self, kind, items):
+        """
+        把日志中属于 kind 的事件应用到 items 上（按 id 匹配，没有 id 的旧事件按名称匹配）。
+        已经在快照中的事件会被跳过，因此重复回放是安全的。
+        """
+        by_id = {item.id: item for item in items}
+        by_name = {item.name: item for item in items}
+        seen = {}
+        for event in self.read():
+            if event.get('kind') != kind:
+                continue
+            if 'id' in event:
+                item = by_id.get(event['id'])
+            else:
+                item = by_name.get(event.get('name'))
+            if item is None:
+                continue
+            if item.id not in seen:
+                seen[item.id] = {tuple(h) for h in item.progress_history}
+            entry = (event['timestamp'], event['description'], event['progress'])
+            if entry in seen[item.id]:
+                continue
+            item.progress_history.append(entry)
+            item.progress = event['progress']
+            seen[item.id].add(entry)
@@ -0,0 +1,112 @@
+# recall_log.py
+
+import os
+
+import numpy as np
+
+from spaced_repetition import PASSING_GRADE
+
+
+class RecallLog:
+    """
+    知识点回忆事件的追加式日志，按列存放。
+
+    文件由定长的二进制记录组成（知识点 id、日期序数、评分、间隔天数，每条 19 字节），
+    每次回忆只在末尾追加并 fsync。加载时用 numpy 一次读入，内存中每个字段是一列 numpy 数组，
+    容量不够时成倍扩大，追加是均摊 O(1)；统计查询都是对整列的向量化运算。
+    """
+
+    DTYPE = np.dtype([('kp', 'S12'), ('day', '<i4'), ('grade', 'i1'), ('interval', '<i2')])
+
+    def __init__(self, path):
+        """
+        :param path: 日志文件路径
+        """
+        self.path = path
+        records = np.empty(0, dtype=self.DTYPE)
+        if os.path.exists(path):
+            # 上次写入若被中断，末尾可能有不完整的记录，只读完整的部分
+            count = os.path.getsize(path) // self.DTYPE.itemsize
+            records = np.fromfile(path, dtype=self.DTYPE, count=count)
+            if os.path.getsize(path) != count * self.DTYPE.itemsize:
+                with open(path, 'r+b') as f:
+                    f.truncate(count * self.DTYPE.itemsize)
+        self.size = len(records)
+        self._columns = {name: records[name].copy() for name in self.DTYPE.names}
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        """某个字段的全部值（只读视图）：'kp'、'day'（日期序数）、'grade'、'interval'。"""
+        view = self._columns[name][:self.size]
+        view.flags.writeable = False
+        return view
+
+    def append_many(self, events):
+        """
+        追加一批回忆事件，只写一次盘。
+
+        :param events: [(知识点 id, 日期 date, 评分, 间隔天数)]
+        """
+        if not events:
+            return
+        records = np.array([(kp_id.encode('ascii'), day.toordinal(), grade, interval)
+                            for kp_id, day, grade, interval in events], dtype=self.DTYPE)
+        with open(self.path, 'ab') as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        needed = self.size + len(records)
+        if needed > len(self._columns['day']):
+            capacity = max(needed, 2 * len(self._columns['day']), 64)
+            for name, column in self._columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self._columns[name] = grown
+        for name in self.DTYPE.names:
+            self._columns[name][self.size:needed] = records[name]
+        self.size = needed
+
+    def history(self, kp_id):
+        """
+        某个知识点的回忆记录。
+
+        :return: [(日期序数, 评分, 间隔天数)]，按时间先后排列
+        """
+        mask = self.column('kp') == kp_id.encode('ascii')
+        return list(zip(self.column('day')[mask].tolist(),
+                        self.column('grade')[mask].tolist(),
+                        self.column('interval')[mask].tolist()))
+
+    def recent_mask(self, since_day):
+        """日期序数不早于 since_day 的事件。"""
+        return self.column('day') >= since_day
+
+    def passed_mask(self):
+        return self.column('grade') >= PASSING_GRADE
+
+    def counts_by_group(self, kp_groups, group_count, since_day):
+        """
+        按分组统计自 since_day 以来的回忆次数和成功次数。
+
+        :param kp_groups: {知识点 id: 分组编号}
+        :param group_count: 分组数量
+        :param since_day: 起始日期序数
+        :return: (每组的回忆次数数组, 每组的成功次数数组)
+        """
+        if not kp_groups or not self.size:
+            return np.zeros(group_count, dtype=int), np.zeros(group_count, dtype=int)
+        ids = np.array([kp_id.encode('ascii') for kp_id in kp_groups], dtype='S12')
+        groups = np.fromiter(kp_groups.values(), dtype=int, count=len(kp_groups))
+        order = np.argsort(ids)
+        ids, groups = ids[order], groups[order]
+
+        kp = self.column('kp')
+        position = np.minimum(np.searchsorted(ids, kp), len(ids) - 1)
+        mask = (ids[position] == kp) & self.recent_mask(since_day)
+        event_groups = groups[position[mask]]
+        reviews = np.bincount(event_groups, minlength=group_count)
+        passed = np.bincount(event_groups[self.passed_mask()[mask]], minlength=group_count)
+        return reviews, passed
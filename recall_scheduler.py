@@ -0,0 +1,82 @@
+# recall_scheduler.py
+
+import heapq
+from itertools import count
+
+
+class RecallScheduler:
+    """
+    按下次回忆日期排列的已学知识点的最小堆。
+
+    到期的知识点从堆顶依次弹出，放入按到期顺序排列的 due 字典；回忆后重新入堆，O(log n)。
+    知识点改期或删除时不在堆中查找，只把旧条目标记为失效（惰性删除），弹出时跳过；
+    失效条目超过一半时整体压缩一次。
+    """
+
+    def __init__(self, abilities=()):
+        """
+        :param abilities: AbilityTag 列表
+        """
+        self.rebuild(abilities)
+
+    def rebuild(self, abilities):
+        """按 abilities 中已学习且有回忆日期的知识点重新建堆，O(n)。"""
+        self._heap = []  # [下次回忆日期, 序号, 能力名称, KnowledgePoint 或失效时的 None]
+        self._entries = {}  # 知识点 id -> 堆中的有效条目
+        self._removed = 0  # 堆中失效条目的数量
+        self._counter = count()
+        self.due = {}  # 知识点 id -> (能力名称, KnowledgePoint)，按到期顺序
+        for ability in abilities:
+            for kp in ability.knowledge_points:
+                if kp.learned and kp.next_recall:
+                    self._heap.append(self._entry(ability.name, kp))
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._entries) + len(self.due)
+
+    def _entry(self, ability_name, kp):
+        entry = [kp.next_recall, next(self._counter), ability_name, kp]
+        self._entries[kp.id] = entry
+        return entry
+
+    def schedule(self, ability_name, kp):
+        """
+        知识点的回忆日期变化（或刚学完）后重新入堆；未学习或没有日期的知识点只移除。
+
+        :param ability_name: 所属能力名称
+        :param kp: KnowledgePoint
+        """
+        self.remove(kp)
+        if kp.learned and kp.next_recall:
+            heapq.heappush(self._heap, self._entry(ability_name, kp))
+
+    def remove(self, kp):
+        self.due.pop(kp.id, None)
+        entry = self._entries.pop(kp.id, None)
+        if entry is None:
+            return
+        entry[3] = None
+        self._removed += 1
+        if self._removed > len(self._heap) // 2:
+            self._heap = [entry for entry in self._heap if entry[3] is not None]
+            heapq.heapify(self._heap)
+            self._removed = 0
+
+    def pop_due(self, today_str):
+        """
+        弹出回忆日期不晚于 today_str 的知识点并加入 due。
+
+        :param today_str: 今天的日期字符串 YYYY-MM-DD
+        :return: 本次新到期的 [(能力名称, KnowledgePoint)]，按回忆日期排列
+        """
+        newly_due = []
+        while self._heap and self._heap[0][0] <= today_str:
+            _, _, ability_name, kp = heapq.heappop(self._heap)
+            if kp is None:
+                self._removed -= 1
+                continue
+            del self._entries[kp.id]
+            self.due[kp.id] = (ability_name, kp)
+            newly_due.append((ability_name, kp))
+        return newly_due
@@ -0,0 +1,418 @@
+# repository.py
+
+import atexit
+from collections import defaultdict
+from datetime import date
+import numpy as np
+from models import Project
+from ability_index import AbilityTree, AbilitySearchIndex
+from search_index import SearchIndex
+
+# 参与全文检索的集合：集合名称 -> [(文档类型, 取出对象的函数, 取出文本的函数)]
+SEARCH_SOURCES = {
+    'tasks': [('task', lambda items: items, lambda task: f"{task.name}\n{task.description}")],
+    'projects': [('project', lambda items: items, lambda project: f"{project.name}\n{project.description}")],
+    'diary_entries': [('diary', lambda items: items, lambda entry: f"{entry.category}\n{entry.summary}")],
+    'summaries': [('summary', lambda items: items, lambda summary: f"{summary.title}\n{summary.content}")],
+    'abilities': [('kp', lambda abilities: [kp for ability in abilities for kp in ability.knowledge_points],
+                   lambda kp: kp.content)],
+}
+
+
+class Repository:
+    """
+    所有视图共享的内存数据仓库（identity map）。
+
+    每个集合只通过 DataManager 加载一次，各视图拿到的是同一个列表和同一批模型对象。
+    提供与 DataManager 相同的 load_* / save_* 接口；保存后通知通过 subscribe 注册的回调，
+    其它视图据此刷新，而不必重新读盘。
+    """
+
+    def __init__(self, data_manager):
+        """
+        :param data_manager: 负责持久化的 DataManager 实例
+        """
+        self.data_manager = data_manager
+        self._collections = {}
+        self._subscribers = defaultdict(list)
+        self._by_id = {}  # 集合名称 -> {id: 对象}，第一次按 id 查找时建立，保存时按保存的列表更新
+        self._kp_index = None  # 知识点 id -> (所属 AbilityTag, KnowledgePoint)
+        self._ability_tree = None
+        self._items_by_ability = {}  # 'tasks'/'projects' -> {能力名称: [对象]}，保存该集合或能力标签时失效
+        self._ability_search_index = None
+        self._search_index = None
+        self._indexed_versions = {}  # 文档键 -> 建立索引时对象的版本号
+        self._progress_stale = True  # 记录进度或保存任务/项目后，进度索引和每日进度需要重新同步
+        atexit.register(self.flush)
+
+    def __getattr__(self, name):
+        # 其余接口（如 get_recall_log）直接交给 DataManager
+        return getattr(self.data_manager, name)
+
+    # ----------------- 变更通知 ----------------- #
+    def subscribe(self, collection, callback):
+        """
+        注册集合变更的回调。
+
+        :param collection: 集合名称，如 'tasks'、'projects'
+        :param callback: 无参数的回调函数
+        """
+        self._subscribers[collection].append(callback)
+
+    def notify(self, collection):
+        for callback in list(self._subscribers[collection]):
+            try:
+                callback()
+            except Exception as e:
+                print(f"通知 {collection} 的订阅者时出错: {e}")
+
+    def _get(self, collection, loader):
+        if collection not in self._collections:
+            self._collections[collection] = loader()
+        return self._collections[collection]
+
+    def _save(self, collection, items, saver):
+        saver(items)
+        if self._search_index is not None and collection in SEARCH_SOURCES:
+            self._index_collection(collection, items)
+        if collection in self._by_id:
+            # 新添加的对象随保存进入索引，查找时不必因未命中而重建
+            self._by_id[collection] = {item.id: item for item in items}
+        if collection == 'abilities':
+            self._kp_index = None
+            self._items_by_ability.clear()
+        if collection in ('tasks', 'projects'):
+            self._progress_stale = True
+            self._items_by_ability.pop(collection, None)
+        self.notify(collection)
+
+    # ----------------- 按 id 查找 ----------------- #
+    def _lookup(self, collection, item_id):
+        """按 id 取对象，找不到时返回 None。"""
+        index = self._by_id.get(collection)
+        if index is None:
+            items = getattr(self, 'load_' + collection)()
+            index = self._by_id[collection] = {item.id: item for item in items}
+        return index.get(item_id)
+
+    def get_task(self, task_id):
+        return self._lookup('tasks', task_id)
+
+    def get_project(self, project_id):
+        return self._lookup('projects', project_id)
+
+    def get_diary_entry(self, entry_id):
+        return self._lookup('diary_entries', entry_id)
+
+    def get_summary(self, summary_id):
+        return self._lookup('summaries', summary_id)
+
+    def _knowledge_point_entry(self, kp_id):
+        if self._kp_index is None:
+            self._kp_index = {kp.id: (ability, kp)
+                              for ability in self.load_abilities() for kp in ability.knowledge_points}
+        return self._kp_index.get(kp_id, (None, None))
+
+    def get_knowledge_point(self, kp_id):
+        return self._knowledge_point_entry(kp_id)[1]
+
+    def get_ability_of_knowledge_point(self, kp_id):
+        """返回知识点所属的 AbilityTag，找不到时返回 None。"""
+        return self._knowledge_point_entry(kp_id)[0]
+
+    # ----------------- 加载（每个集合只加载一次） ----------------- #
+    def load_abilities(self):
+        return self._get('abilities', self.data_manager.load_abilities)
+
+    def load_tasks(self):
+        return self._get('tasks', lambda: self.data_manager.load_tasks(self.load_abilities()))
+
+    def load_projects(self):
+        return self._get('projects', lambda: self.data_manager.load_projects(self.load_abilities()))
+
+    def load_diary_entries(self):
+        return self._get('diary_entries', lambda: self.data_manager.load_diary_entries(self.load_abilities()))
+
+    def load_daily_progress(self):
+        return self._get('daily_progress', lambda: self.data_manager.load_daily_progress(self.load_abilities()))
+
+    def load_goals(self):
+        return self._get('goals', self.data_manager.load_goals)
+
+    def load_summaries(self):
+        return self._get('summaries', self.data_manager.load_summaries)
+
+    def load_all_data(self):
+        self.synchronize_daily_progress()
+        return {
+            'tasks': self.load_tasks(),
+            'diary_entries': self.load_diary_entries(),
+            'summaries': self.load_summaries(),
+            'projects': self.load_projects(),
+            'abilities': self.load_abilities(),
+            'daily_progress': self.load_daily_progress(),
+            'goals': self.load_goals()
+        }
+
+    # ----------------- 保存并通知 ----------------- #
+    def save_abilities(self, abilities):
+        self._save('abilities', abilities, self.data_manager.save_abilities)
+
+    def save_tasks(self, tasks):
+        self._save('tasks', tasks, self.data_manager.save_tasks)
+
+    def save_projects(self, projects):
+        self._save('projects', projects, self.data_manager.save_projects)
+
+    def save_diary_entries(self, diary_entries):
+        self._save('diary_entries', diary_entries, self.data_manager.save_diary_entries)
+
+    def save_daily_progress(self, daily_progress_list):
+        self._save('daily_progress', daily_progress_list, self.data_manager.save_daily_progress)
+
+    def save_goals(self, goals):
+        self._save('goals', goals, self.data_manager.save_goals)
+
+    def save_summaries(self, summaries):
+        self._save('summaries', summaries, self.data_manager.save_summaries)
+
+    def save_all_data(self, tasks, diary_entries, summaries, projects, abilities, daily_progress, goals):
+        self.save_tasks(tasks)
+        self.save_diary_entries(diary_entries)
+        self.save_summaries(summaries)
+        self.save_projects(projects)
+        self.save_abilities(abilities)
+        self.save_daily_progress(daily_progress)
+        self.save_goals(goals)
+
+    # ----------------- 能力标签 ----------------- #
+    def get_ability_tree(self):
+        """
+        返回能力标签层级的索引。
+
+        通过 add_ability / delete_ability / move_ability / rename_ability 修改层级时索引增量更新；
+        若能力标签列表被直接修改导致数量不一致，则整体重建。
+        """
+        abilities = self.load_abilities()
+        if self._ability_tree is None or self._ability_tree.abilities is not abilities or \
+                self._ability_tree.size != len(abilities):
+            self._ability_tree = AbilityTree(abilities)
+        return self._ability_tree
+
+    def get_ability_search_index(self):
+        """返回所有搜索框共用的能力名称索引，随 add/delete/rename_ability 增量更新。"""
+        abilities = self.load_abilities()
+        if self._ability_search_index is None or self._ability_search_index.size != len(abilities):
+            self._ability_search_index = AbilitySearchIndex([ability.name for ability in abilities])
+        return self._ability_search_index
+
+    def abilities_by_name(self, names):
+        """
+        按名称取能力标签，忽略已不存在的名称。
+        列表框经搜索过滤后行号与能力标签列表的下标不再对应，选中项应按显示的名称解析。
+
+        :param names: 能力名称序列
+        :return: AbilityTag 列表，顺序与 names 一致
+        """
+        by_name = self.get_ability_tree().by_name
+        return [by_name[name] for name in names if name in by_name]
+
+    def add_ability(self, ability):
+        """添加能力标签并保存。"""
+        ability_tree = self.get_ability_tree()
+        search_index = self.get_ability_search_index()
+        self.load_abilities().append(ability)
+        ability_tree.add(ability)
+        search_index.add(ability.name)
+        self.save_abilities(self.load_abilities())
+
+    def delete_ability(self, ability):
+        """删除能力标签并保存。"""
+        ability_tree = self.get_ability_tree()
+        search_index = self.get_ability_search_index()
+        self.load_abilities().remove(ability)
+        ability_tree.remove(ability)
+        search_index.remove(ability.name)
+        self.save_abilities(self.load_abilities())
+
+    def move_ability(self, ability, new_parent):
+        """
+        修改能力标签的父标签并保存，子树随之移动。
+        调用方需先用 get_ability_tree().is_descendant 排除循环引用。
+        """
+        if new_parent == ability.parent:
+            return
+        ability_tree = self.get_ability_tree()
+        old_parent = ability.parent
+        ability.parent = new_parent
+        ability_tree.move(ability, old_parent)
+        self.save_abilities(self.load_abilities())
+
+    def items_under_ability(self, collection, ability_name):
+        """
+        关联到 ability_name 子树中任一能力标签的记录，每个只出现一次。
+
+        子树中的能力名称是按 tin 排序的编号中的一段区间，再按能力名称 -> 记录的倒排索引取出记录，
+        不扫描整个集合。
+
+        :param collection: 'tasks'、'projects' 或 'knowledge_points'
+        :param ability_name: 子树根节点的能力名称
+        """
+        ability_tree = self.get_ability_tree()
+        names = ability_tree.subtree_names(ability_name)
+        if collection == 'knowledge_points':
+            return [kp for name in names for kp in ability_tree.by_name[name].knowledge_points]
+
+        index = self._items_by_ability.get(collection)
+        if index is None:
+            index = self._items_by_ability[collection] = defaultdict(list)
+            for item in getattr(self, 'load_' + collection)():
+                for ability in item.abilities:
+                    index[ability.name].append(item)
+        items = []
+        seen = set()
+        for name in names:
+            for item in index.get(name, ()):
+                if id(item) not in seen:
+                    seen.add(id(item))
+                    items.append(item)
+        return items
+
+    def retention_by_ability(self, days=90, today=None):
+        """
+        每个能力标签子树（含所有子孙能力的知识点）最近 days 天的记忆保持率。
+
+        回忆日志按知识点所属能力的先序位置分组计数，再用前缀和按子树区间求和，
+        对日志的扫描都是向量化的。
+
+        :param days: 统计的天数
+        :param today: 截止日期（date），默认为今天
+        :return: {能力名称: (回忆次数, 成功的比例)}；没有回忆记录时比例为 None
+        """
+        ability_tree = self.get_ability_tree()
+        names, ranges = ability_tree.subtree_ranges()
+        kp_groups = {kp.id: group for group, name in enumerate(names)
+                     for kp in ability_tree.by_name[name].knowledge_points}
+        since_day = (today or date.today()).toordinal() - days
+        reviews, passed = self.get_recall_log().counts_by_group(kp_groups, len(names), since_day)
+
+        review_sums = np.concatenate(([0], np.cumsum(reviews)))
+        passed_sums = np.concatenate(([0], np.cumsum(passed)))
+        retention = {}
+        for name, (start, end) in ranges.items():
+            count = int(review_sums[end] - review_sums[start])
+            rate = float(passed_sums[end] - passed_sums[start]) / count if count else None
+            retention[name] = (count, rate)
+        return retention
+
+    def rename_ability(self, ability, new_name):
+        """
+        重命名能力标签。
+
+        记录里只保存能力名称，因此子能力的 parent 以及引用该能力的任务、项目、日记和每日进度都要一起重写。
+
+        :param ability: 要重命名的 AbilityTag 对象
+        :param new_name: 新名称
+        """
+        old_name = ability.name
+        if new_name == old_name:
+            return
+        abilities = self.load_abilities()
+        ability_tree = self.get_ability_tree()
+        for child in ability_tree.children.get(old_name, []):
+            child.parent = new_name
+        ability.name = new_name
+        ability_tree.rename(old_name, new_name)
+        self.get_ability_search_index().rename(old_name, new_name)
+
+        references = [('tasks', 'abilities'), ('projects', 'abilities'),
+                      ('diary_entries', 'tags'), ('daily_progress', 'tags')]
+        for collection, attr in references:
+            items = getattr(self, 'load_' + collection)()
+            referencing = [item for item in items if any(a is ability for a in getattr(item, attr))]
+            for item in referencing:
+                item.touch()
+            if referencing:
+                getattr(self, 'save_' + collection)(items)
+        self.save_abilities(abilities)
+
+    # ----------------- 全文检索 ----------------- #
+    def get_search_index(self):
+        """
+        返回日记、任务与项目描述、阶段性总结和知识点内容的全文检索索引。
+
+        首次调用时读取持久化的索引，再与当前数据核对：只为内容变化（crc32 不同）的记录重新建立索引。
+        之后这些集合每次保存都会增量更新索引；索引在 flush() 时写盘。
+        """
+        if self._search_index is None:
+            data = self.data_manager.load_search_index()
+            self._search_index = SearchIndex.from_dict(data) if data else SearchIndex()
+            for collection in SEARCH_SOURCES:
+                self._index_collection(collection, getattr(self, 'load_' + collection)())
+        return self._search_index
+
+    def _index_collection(self, collection, items):
+        index = self._search_index
+        for kind, select, text_of in SEARCH_SOURCES[collection]:
+            current = set()
+            for obj in select(items):
+                key = f"{kind}:{obj.id}"
+                current.add(key)
+                # 版本号没变的对象内容一定没变，连 crc32 都不必计算
+                if self._indexed_versions.get(key) != obj.version:
+                    index.update(key, text_of(obj))
+                    self._indexed_versions[key] = obj.version
+            for key in index.keys(kind):
+                if key not in current:
+                    index.remove(key)
+                    self._indexed_versions.pop(key, None)
+
+    def search(self, query, limit=50):
+        """
+        全文检索。
+
+        :return: [(文档类型, 对象, 得分)]，类型为 'task'、'project'、'diary'、'summary' 或 'kp'
+        """
+        getters = {'task': self.get_task, 'project': self.get_project, 'diary': self.get_diary_entry,
+                   'summary': self.get_summary, 'kp': self.get_knowledge_point}
+        results = []
+        for key, score in self.get_search_index().search(query, limit):
+            kind, obj_id = key.split(':', 1)
+            obj = getters[kind](obj_id)
+            if obj is not None:
+                results.append((kind, obj, score))
+        return results
+
+    def flush(self):
+        """把有变化的检索索引写盘，并等待所有排队中的保存完成。"""
+        if self._search_index is not None and self._search_index.dirty:
+            self.data_manager.save_search_index(self._search_index.to_dict())
+            self._search_index.dirty = False
+        self.data_manager.flush()
+
+    # ----------------- 进度 ----------------- #
+    def record_progress(self, item, entry, tasks=None, projects=None):
+        """见 DataManager.record_progress，完成后通知对应集合的订阅者。"""
+        if tasks is None:
+            tasks = self.load_tasks()
+        if projects is None:
+            projects = self.load_projects()
+        self.data_manager.record_progress(item, entry, tasks, projects)
+        self._progress_stale = True
+        self.notify('projects' if isinstance(item, Project) else 'tasks')
+
+    def get_progress_index(self):
+        """
+        任务和项目的进度历史按日期建立的索引（含每天完成的对象）。
+
+        与每日进度共用 DataManager 中的同一个索引，只在记录进度或保存任务/项目之后才增量同步一次。
+        """
+        if self._progress_stale:
+            self.synchronize_daily_progress()
+        return self.data_manager.progress_index
+
+    def synchronize_daily_progress(self):
+        """用共享的任务、项目和每日进度列表同步，不重新读盘。"""
+        self.data_manager.synchronize_daily_progress(self.load_tasks(), self.load_daily_progress(),
+                                                     self.load_projects())
+        self._progress_stale = False
@@ -0,0 +1,145 @@
+# sampling.py
+
+import random
+
+
+def floyd_sample(n, k, rng=random):
+    """
+    从 range(n) 中等概率、不放回地抽取 k 个下标（Floyd 算法），O(k)，不复制也不打乱总体。
+
+    :return: 下标列表；k 大于 n 时返回全部 n 个下标
+    """
+    k = min(k, n)
+    chosen = set()
+    order = []
+    for j in range(n - k, n):
+        t = rng.randint(0, j)
+        if t in chosen:
+            t = j
+        chosen.add(t)
+        order.append(t)
+    return order
+
+
+class AliasTable:
+    """
+    加权随机抽样的别名表（Vose 算法）：建表 O(n)，每次抽样 O(1)（有放回）。
+    """
+
+    def __init__(self, weights):
+        """
+        :param weights: 非负权重列表，至少有一个为正
+        """
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # 剩下的都是浮点误差范围内等于 1 的格子，prob 保持 1.0
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng=random):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class SamplingPool:
+    """
+    可增删的待抽样对象集合。
+
+    对象存放在列表中并记录各自的下标，删除时与末尾对象交换后弹出，增删都是 O(1)。
+    等概率抽样用 Floyd 算法；加权抽样按权重方案缓存别名表，抽到重复对象时重抽，
+    k 远小于总数时每批的期望代价是 O(k)。增删对象后别名表在下一次加权抽样时重建。
+    """
+
+    MAX_REJECTIONS = 20  # 每个名额允许的重抽次数，超过后剩下的名额改为等概率补足
+
+    def __init__(self, items=(), key=id, weightings=None):
+        """
+        :param items: 初始对象
+        :param key: 函数，对象 -> 唯一键
+        :param weightings: {方案名称: 函数(对象列表) -> 权重列表}
+        """
+        self.key = key
+        self.weightings = weightings or {}
+        self.rebuild(items)
+
+    def rebuild(self, items):
+        self.items = []
+        self._positions = {}
+        self._alias_tables = {}
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return self.key(item) in self._positions
+
+    def add(self, item):
+        key = self.key(item)
+        if key in self._positions:
+            return
+        self._positions[key] = len(self.items)
+        self.items.append(item)
+        self._alias_tables.clear()
+
+    def remove(self, item):
+        position = self._positions.pop(self.key(item), None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self._positions[self.key(last)] = position
+        self._alias_tables.clear()
+
+    def invalidate_weights(self):
+        """权重依据的数据（例如兴趣程度）变化后调用。"""
+        self._alias_tables.clear()
+
+    def sample(self, k, weighting=None, rng=random):
+        """
+        不放回地抽取 k 个对象。
+
+        :param k: 抽取的数量
+        :param weighting: 权重方案名称，为 None 时等概率抽取
+        :return: 对象列表
+        """
+        n = len(self.items)
+        if weighting is None or k >= n:
+            return [self.items[i] for i in floyd_sample(n, k, rng)]
+
+        table = self._alias_tables.get(weighting)
+        if table is None:
+            weights = self.weightings[weighting](self.items)
+            if not any(w > 0 for w in weights):
+                return [self.items[i] for i in floyd_sample(n, k, rng)]
+            table = self._alias_tables[weighting] = AliasTable(weights)
+
+        chosen = []
+        seen = set()
+        attempts = k * self.MAX_REJECTIONS
+        while len(chosen) < k and attempts:
+            attempts -= 1
+            i = table.sample(rng)
+            if i not in seen:
+                seen.add(i)
+                chosen.append(i)
+        if len(chosen) < k:
+            # 权重高度集中时重抽可能一直命中已选对象，剩下的名额等概率补足
+            rest = [i for i in range(n) if i not in seen]
+            chosen.extend(rest[j] for j in floyd_sample(len(rest), k - len(chosen), rng))
+        return [self.items[i] for i in chosen]
@@ -0,0 +1,131 @@
+# search_index.py
+
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+
+# 连续的中日韩字符切成二元组，连续的字母数字作为一个词
+_TOKEN_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[a-z0-9]+')
+_CJK_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+
+def tokenize(text):
+    """
+    把文本切成检索词：中文按相邻两字（二元组）切分，单独的一个汉字保留为一个词；
+    英文和数字按连续字母数字切分并转为小写。
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class SearchIndex:
+    """
+    全文检索的倒排索引，按 BM25 排序。
+
+    文档键形如 'task:<id>'。每个文档记录文本的 crc32，内容不变时重复建立索引直接跳过；
+    索引可以整体序列化为字典持久化，下次启动时只需为变化过的文档重新建立索引。
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # 检索词 -> {文档键: 词频}
+        self.docs = {}  # 文档键 -> [crc32, 文档长度, 检索词列表]
+        self.total_length = 0
+        self.dirty = False
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        for term, postings in data.get('postings', {}).items():
+            index.postings[term] = postings
+        index.docs = data.get('docs', {})
+        index.total_length = sum(doc[1] for doc in index.docs.values())
+        return index
+
+    def to_dict(self):
+        return {
+            'postings': {term: dict(postings) for term, postings in self.postings.items()},
+            'docs': {key: list(doc) for key, doc in self.docs.items()}
+        }
+
+    def keys(self, kind):
+        """某一类文档的所有文档键。"""
+        prefix = kind + ':'
+        return [key for key in self.docs if key.startswith(prefix)]
+
+    def update(self, key, text):
+        """
+        为一个文档建立（或更新）索引。
+
+        :return: 索引是否发生了变化
+        """
+        checksum = zlib.crc32(text.encode('utf-8'))
+        doc = self.docs.get(key)
+        if doc is not None and doc[0] == checksum:
+            return False
+        self.remove(key)
+        counts = Counter(tokenize(text))
+        length = sum(counts.values())
+        for term, tf in counts.items():
+            self.postings[term][key] = tf
+        self.docs[key] = [checksum, length, list(counts)]
+        self.total_length += length
+        self.dirty = True
+        return True
+
+    def remove(self, key):
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        for term in doc[2]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= doc[1]
+        self.dirty = True
+
+    def _expand(self, term):
+        """单个汉字不在二元组索引中，展开为包含它的所有检索词。"""
+        if term in self.postings or len(term) != 1:
+            return [term]
+        return [candidate for candidate in self.postings if term in candidate]
+
+    def search(self, query, limit=50):
+        """
+        :param query: 查询文本，按与文档相同的方式切词
+        :param limit: 最多返回的结果数
+        :return: [(文档键, 得分)]，按得分从高到低排列
+        """
+        terms = []
+        for token in dict.fromkeys(tokenize(query)):
+            terms.extend(self._expand(token))
+        if not terms or not self.docs:
+            return []
+
+        doc_count = len(self.docs)
+        average_length = self.total_length / doc_count or 1
+        scores = defaultdict(float)
+        for term in dict.fromkeys(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.K1 * (1 - self.B + self.B * self.docs[key][1] / average_length)
+                scores[key] += idf * tf * (self.K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
@@ -0,0 +1,90 @@
+# spaced_repetition.py
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from models import KnowledgePoint, recall_interval
+
+# 回忆评分（0-5），不低于 PASSING_GRADE 视为回忆成功
+GRADES = {"忘记": 1, "困难": 3, "良好": 4, "轻松": 5}
+PASSING_GRADE = 3
+MIN_EASE = 1.3
+
+
+def sm2(ease, repetitions, intervals, lapses, grades):
+    """
+    SM-2 间隔重复算法的向量化实现，一次计算整批知识点。
+
+    :param ease: 难度系数数组
+    :param repetitions: 连续回忆成功次数数组
+    :param intervals: 上一次的回忆间隔（天）数组
+    :param lapses: 遗忘次数数组
+    :param grades: 本次回忆的评分数组（0-5）
+    :return: (ease, repetitions, intervals, lapses) 更新后的新数组
+    """
+    ease = np.asarray(ease, dtype=float)
+    repetitions = np.asarray(repetitions, dtype=int)
+    intervals = np.asarray(intervals, dtype=float)
+    lapses = np.asarray(lapses, dtype=int)
+    grades = np.asarray(grades, dtype=int)
+
+    passed = grades >= PASSING_GRADE
+    # 第一次成功隔 1 天，第二次隔 6 天，之后按难度系数放大
+    grown = np.where(repetitions == 0, 1, np.where(repetitions == 1, 6, np.rint(intervals * ease)))
+    new_intervals = np.where(passed, np.maximum(grown, 1), 1).astype(int)
+    new_repetitions = np.where(passed, repetitions + 1, 0)
+    new_lapses = lapses + (~passed).astype(int)
+
+    miss = 5 - grades
+    new_ease = np.maximum(ease + 0.1 - miss * (0.08 + miss * 0.02), MIN_EASE)
+    return new_ease, new_repetitions, new_intervals, new_lapses
+
+
+def current_interval(kp):
+    """知识点当前的回忆间隔（天），由上次和下次回忆日期推出；缺少日期时为 1。"""
+    return recall_interval(kp.last_recall, kp.next_recall)
+
+
+def review(kps, grades, today=None):
+    """
+    按评分批量更新知识点的难度系数、成功与遗忘次数和下次回忆日期。
+
+    :param kps: KnowledgePoint 列表
+    :param grades: 与 kps 一一对应的评分，或对所有知识点使用的同一个评分
+    :param today: 回忆日期（date），默认为今天
+    :return: 每个知识点新的回忆间隔（天）列表
+    """
+    if not kps:
+        return []
+    today = today or date.today()
+    if np.isscalar(grades):
+        grades = [grades] * len(kps)
+
+    ease, repetitions, intervals, lapses = sm2(
+        [kp.ease for kp in kps],
+        [kp.repetitions for kp in kps],
+        [current_interval(kp) for kp in kps],
+        [kp.lapses for kp in kps],
+        grades
+    )
+
+    today_str = today.strftime('%Y-%m-%d')
+    for i, kp in enumerate(kps):
+        kp.ease = round(float(ease[i]), 2)
+        kp.repetitions = int(repetitions[i])
+        kp.lapses = int(lapses[i])
+        kp.last_recall = today_str
+        kp.next_recall = (today + timedelta(days=int(intervals[i]))).strftime('%Y-%m-%d')
+    return [int(interval) for interval in intervals]
+
+
+def start_learning(kp, today=None):
+    """刚学完的知识点从初始状态开始，第二天第一次回忆。"""
+    today = today or date.today()
+    kp.learned = True
+    kp.ease = KnowledgePoint.DEFAULT_EASE
+    kp.repetitions = 0
+    kp.lapses = 0
+    kp.last_recall = today.strftime('%Y-%m-%d')
+    kp.next_recall = (today + timedelta(days=1)).strftime('%Y-%m-%d')
@@ -0,0 +1,128 @@
+# sqlite_storage.py
+
+import functools
+import json
+import sqlite3
+import threading
+
+from models import new_id
+
+# 每个集合对应一张表 -> 作为主键的字段。行按主键读写，pos 只用于恢复列表顺序，
+# 不要求连续：删除一行不影响其它行，只有顺序改变的行才需要改写 pos
+TABLES = {
+    'tasks': 'id',
+    'projects': 'id',
+    'abilities': 'name',
+    'knowledge_points': 'id',
+    'diary_entries': 'id',
+    'daily_progress': 'progress_date',
+    'goals': 'id',
+    'summaries': 'id',
+}
+
+
+def _locked(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SQLiteStorage:
+    """
+    基于 sqlite3 的存储后端，每种模型一张表。
+
+    每行以模型的 id（能力标签为名称，每日进度为日期）为主键，data 保存完整的 to_dict() 结果。
+    与 JSON 文件不同，修改、添加或删除一条记录只需按主键写入或删除一行。
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        # 写入由后台线程执行，读取在界面线程，连接在两者间共享并用锁串行化
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    @_locked
+    def create_schema(self):
+        with self.conn:
+            for table in TABLES:
+                columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+                if columns and 'row_key' not in columns:
+                    self._upgrade_position_keyed_table(table)
+                self.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"(row_key TEXT PRIMARY KEY, pos INTEGER NOT NULL, data TEXT NOT NULL)"
+                )
+
+    def _upgrade_position_keyed_table(self, table):
+        """早期版本的表以列表位置为主键，按记录的主键字段重建，数据和顺序不变。"""
+        records = [json.loads(data) for (data,) in self.conn.execute(f"SELECT data FROM {table} ORDER BY pos")]
+        self.conn.execute(f"DROP TABLE {table}")
+        self.conn.execute(
+            f"CREATE TABLE {table} (row_key TEXT PRIMARY KEY, pos INTEGER NOT NULL, data TEXT NOT NULL)"
+        )
+        key = TABLES[table]
+        rows = []
+        for pos, record in enumerate(records):
+            if not record.get(key):
+                record[key] = new_id()
+            rows.append((record[key], pos, record))
+        self._insert_rows(table, rows)
+
+    @_locked
+    def close(self):
+        self.conn.close()
+
+    @_locked
+    def is_empty(self):
+        """所有表都没有数据时返回 True，用于首次从 JSON 文件迁移。"""
+        for table in TABLES:
+            if self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+        return True
+
+    def _insert_rows(self, table, rows):
+        self.conn.executemany(
+            f"INSERT INTO {table} (row_key, pos, data) VALUES (?, ?, ?) "
+            f"ON CONFLICT(row_key) DO UPDATE SET pos = excluded.pos, data = excluded.data",
+            ((key, pos, json.dumps(record, ensure_ascii=False)) for key, pos, record in rows)
+        )
+
+    @_locked
+    def load(self, table):
+        """按列表顺序返回表中所有记录（字典）。"""
+        rows = self.conn.execute(f"SELECT data FROM {table} ORDER BY pos")
+        return [json.loads(data) for (data,) in rows]
+
+    @_locked
+    def positions(self, table):
+        """表中每一行的主键 -> pos。"""
+        return dict(self.conn.execute(f"SELECT row_key, pos FROM {table}"))
+
+    @_locked
+    def replace_tables(self, tables):
+        """
+        在同一个事务中替换多张表的全部内容，例如能力标签及其知识点。
+
+        :param tables: {表名: [(主键, pos, 记录)]}
+        """
+        with self.conn:
+            for table, rows in tables.items():
+                self.conn.execute(f"DELETE FROM {table}")
+                self._insert_rows(table, rows)
+
+    @_locked
+    def update_tables(self, tables):
+        """
+        在同一个事务中按主键删除、写入多张表中的行，其余的行不动。
+
+        :param tables: {表名: ([(主键, pos, 记录)], 要删除的主键)}
+        """
+        with self.conn:
+            for table, (rows, deletes) in tables.items():
+                self.conn.executemany(f"DELETE FROM {table} WHERE row_key = ?", ((key,) for key in deletes))
+                self._insert_rows(table, rows)
@@ -31,12 +31,16 @@ class AbilitiesView:
         self.data_manager = data_manager
         self.abilities = self.data_manager.load_abilities()
         self.projects = self.data_manager.load_projects()
+        self._saving = False  # 本视图自己保存时不必响应变更通知
 
         self.frame = ttk.Frame(self.parent)
         self.frame.pack(fill='both', expand=True)
 
         self.create_widgets()
 
+        # 其它页面修改能力标签后刷新能力树
+        self.data_manager.subscribe('abilities', self.on_abilities_changed)
+
     def create_widgets(self):
         # 搜索框架
         search_frame = tk.Frame(self.frame)
@@ -73,10 +77,14 @@ class AbilitiesView:
         self.tree = ttk.Treeview(self.frame, show='tree', selectmode='browse')
         self.tree.pack(fill='both', expand=True, padx=10, pady=10)
 
+        self.visible_names = None
+        self.search_term = None
         self.refresh_treeview()
 
         # 绑定双击事件以查看知识点
         self.tree.bind("<Double-1>", self.on_double_click)
+        # 展开节点时再插入子节点
+        self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
 
     def search_abilities(self):
         search_term = self.search_var.get().strip()
@@ -92,49 +100,101 @@ class AbilitiesView:
     def refresh_treeview(self, search_term=None):
         """
         刷新能力标签的 Treeview，以树状结构展示。
-        如果提供了搜索关键字，只显示匹配的节点。
+        只插入顶层节点，子节点在展开时才插入。
+        如果提供了搜索关键字，只显示匹配的节点，并展开通向匹配节点的分支。
         """
         # 清空当前的树
         self.tree.delete(*self.tree.get_children())
 
-        # 创建一个字典，用于快速查找能力标签
-        ability_dict = {ability.name: ability for ability in self.abilities}
-
-        # 创建一个字典，存储每个节点的 Treeview item ID
-        tree_items = {}
-
-        # 定义一个函数，用于判断能力标签是否匹配搜索关键字
-        def matches_search(ability):
-            if not search_term:
-                return True
-            return search_term.lower() in ability.name.lower()
-
-        # 定义一个函数，判断子孙节点是否有匹配搜索关键字的
-        def has_matching_descendant(ability):
-            children = [a for a in self.abilities if a.parent == ability.name]
-            for child in children:
-                if matches_search(child) or has_matching_descendant(child):
-                    return True
-            return False
-
-        # 递归地添加子节点
-        def add_children(parent_ability, parent_item):
-            children = [ability for ability in self.abilities if ability.parent == parent_ability.name]
-            for child in children:
-                # 如果子节点或其子孙节点匹配搜索，则添加到树中
-                if matches_search(child) or has_matching_descendant(child):
-                    child_item = self.tree.insert(parent_item, 'end', text=child.name, values=(child.name,))
-                    tree_items[child.name] = child_item
-                    add_children(child, child_item)
-
-        # 添加根节点及其子节点
-        roots = [ability for ability in self.abilities if not ability.parent]
-        for root in roots:
-            # 如果根节点或其子孙节点匹配搜索，则添加到树中
-            if matches_search(root) or has_matching_descendant(root):
-                root_item = self.tree.insert('', 'end', text=root.name, values=(root.name,))
-                tree_items[root.name] = root_item
-                add_children(root, root_item)
+        ability_tree = self.data_manager.get_ability_tree()
+        self.search_term = search_term
+        # 自身或子孙节点匹配搜索关键字的能力名称；为 None 表示不过滤
+        self.visible_names = ability_tree.matching_names(search_term) if search_term else None
+
+        for root in ability_tree.roots:
+            self.insert_ability('', root)
+
+    def on_abilities_changed(self):
+        if not self._saving:
+            self.reload_treeview()
+
+    def reload_treeview(self):
+        """重建能力树，保留当前的搜索过滤、已展开的节点和选中项。"""
+        open_names = set()
+        selected_names = {self.tree.item(item, 'text') for item in self.tree.selection()}
+        stack = list(self.tree.get_children())
+        while stack:
+            item = stack.pop()
+            if self.tree.item(item, 'open'):
+                open_names.add(self.tree.item(item, 'text'))
+                stack.extend(self.tree.get_children(item))
+
+        self.refresh_treeview(search_term=self.search_term)
+
+        by_name = self.data_manager.get_ability_tree().by_name
+        stack = list(self.tree.get_children())
+        while stack:
+            item = stack.pop()
+            name = self.tree.item(item, 'text')
+            if name in selected_names:
+                self.tree.selection_add(item)
+            if name in open_names and name in by_name:
+                children = self.tree.get_children(item)
+                if len(children) == 1 and 'placeholder' in self.tree.item(children[0], 'tags'):
+                    self.populate_children(item, by_name[name])
+                self.tree.item(item, open=True)
+                stack.extend(self.tree.get_children(item))
+
+    def save_abilities(self):
+        """保存知识点的修改；能力树不受影响，忽略由此触发的变更通知。"""
+        self._saving = True
+        try:
+            self.data_manager.save_abilities(self.abilities)
+        finally:
+            self._saving = False
+
+    def change_abilities(self, change):
+        """执行会保存能力标签的修改，忽略由此触发的变更通知，完成后只刷新一次能力树。"""
+        self._saving = True
+        try:
+            change()
+        finally:
+            self._saving = False
+        self.reload_treeview()
+
+    def visible_children(self, ability):
+        children = self.data_manager.get_ability_tree().children_of(ability)
+        if self.visible_names is None:
+            return children
+        return [child for child in children if child.name in self.visible_names]
+
+    def insert_ability(self, parent_item, ability):
+        """插入一个能力标签节点；有子节点时先放一个占位子节点，使其可以展开。"""
+        if self.visible_names is not None and ability.name not in self.visible_names:
+            return
+        item = self.tree.insert(parent_item, 'end', text=ability.name, values=(ability.name,))
+        if not self.visible_children(ability):
+            return
+        if self.visible_names is not None:
+            # 搜索时直接展开通向匹配节点的分支
+            self.populate_children(item, ability)
+            self.tree.item(item, open=True)
+        else:
+            self.tree.insert(item, 'end', text='', tags=('placeholder',))
+
+    def populate_children(self, item, ability):
+        self.tree.delete(*self.tree.get_children(item))
+        for child in self.visible_children(ability):
+            self.insert_ability(item, child)
+
+    def on_tree_open(self, event):
+        """节点第一次展开时用真正的子节点替换占位节点。"""
+        item = self.tree.focus()
+        children = self.tree.get_children(item)
+        if len(children) == 1 and 'placeholder' in self.tree.item(children[0], 'tags'):
+            ability = self.data_manager.get_ability_tree().by_name.get(self.tree.item(item, 'text'))
+            if ability:
+                self.populate_children(item, ability)
 
     def on_double_click(self, event):
         selected_item = self.tree.selection()
@@ -200,9 +260,9 @@ class AbilitiesView:
 
         projects_list = tk.Listbox(kp_window, width=50)
         projects_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        related_projects = [p.name for p in self.projects if any(a.name == ability.name for a in p.abilities)]
-        for project in related_projects:
-            projects_list.insert(tk.END, project)
+        # 子能力的项目同样算作相关项目
+        for project in self.data_manager.items_under_ability('projects', ability.name):
+            projects_list.insert(tk.END, project.name)
 
         # 关闭按钮
         close_button = tk.Button(kp_window, text="关闭", command=kp_window.destroy)
@@ -213,7 +273,7 @@ class AbilitiesView:
         更新知识点的学习状态。
         """
         kp.learned = var.get()
-        self.data_manager.save_abilities(self.abilities)
+        self.save_abilities()
 
     def add_knowledge_point(self, ability, parent_frame):
         """
@@ -223,7 +283,7 @@ class AbilitiesView:
         if content:
             new_kp = KnowledgePoint(content=content)
             ability.knowledge_points.append(new_kp)
-            self.data_manager.save_abilities(self.abilities)
+            self.save_abilities()
             # 添加新的复选框
             var = tk.BooleanVar(value=new_kp.learned)
             cb = tk.Checkbutton(parent_frame, text=new_kp.content, variable=var,
@@ -256,7 +316,7 @@ class AbilitiesView:
                     if isinstance(child, tk.Checkbutton) and child.cget("text") == kp_to_delete:
                         child.destroy()
                         break
-            self.data_manager.save_abilities(self.abilities)
+            self.save_abilities()
             display_info("成功", "选定的知识点已删除。")
 
     def add_ability(self):
@@ -295,9 +355,7 @@ class AbilitiesView:
                 return
 
             new_ability = AbilityTag(name, parent)
-            self.abilities.append(new_ability)
-            self.data_manager.save_abilities(self.abilities)
-            self.refresh_treeview()
+            self.change_abilities(lambda: self.data_manager.add_ability(new_ability))
             add_window.destroy()
             display_info("成功", "能力标签已添加。")
 
@@ -349,28 +407,17 @@ class AbilitiesView:
                     messagebox.showwarning("警告", "该能力标签已存在！")
                     return
 
-                # 检查是否形成循环引用
-                def has_cycle(current_name, target_name):
-                    while current_name:
-                        if current_name == target_name:
-                            return True
-                        current_ability = next((a for a in self.abilities if a.name == current_name), None)
-                        if current_ability:
-                            current_name = current_ability.parent
-                        else:
-                            break
-                    return False
-
-                if new_parent and has_cycle(new_parent, ability.name):
+                # 检查是否形成循环引用：新的父标签不能是自身或其子孙
+                if new_parent and self.data_manager.get_ability_tree().is_descendant(new_parent, ability.name):
                     messagebox.showwarning("警告", "不能将子能力设置为父能力！")
                     return
 
-                # 更新能力标签
-                ability.name = new_name
-                ability.parent = new_parent
+                # 更新能力标签（两者都会保存）；改名时引用它的记录和子能力一起更新
+                def change():
+                    self.data_manager.move_ability(ability, new_parent)
+                    self.data_manager.rename_ability(ability, new_name)
 
-                self.data_manager.save_abilities(self.abilities)
-                self.refresh_treeview()
+                self.change_abilities(change)
                 edit_window.destroy()
                 display_info("成功", "能力标签已更新。")
 
@@ -393,16 +440,14 @@ class AbilitiesView:
                 return
 
             # 检查是否有其他标签以当前标签为父标签
-            children = [a for a in self.abilities if a.parent == ability.name]
+            children = self.data_manager.get_ability_tree().children_of(ability)
             if children:
                 display_error("错误", f"无法删除 '{ability.name}' 标签，因为它有子标签。")
                 return
 
             confirm = messagebox.askyesno("确认", f"确定要删除能力标签 '{ability.name}' 吗？")
             if confirm:
-                self.abilities.remove(ability)
-                self.data_manager.save_abilities(self.abilities)
-                self.refresh_treeview()
+                self.change_abilities(lambda: self.data_manager.delete_ability(ability))
                 display_info("成功", "能力标签已删除。")
         else:
             display_error("错误", "请选择要删除的能力标签！")
@@ -599,7 +644,7 @@ class AbilitiesView:
         details_window.grab_set()
 
         # 项目列表
-        projects = [p for p in self.projects if any(a.name == ability_name for a in p.abilities)]
+        projects = self.data_manager.items_under_ability('projects', ability_name)
         projects_label = tk.Label(details_window, text="相关项目:")
         projects_label.pack(anchor=tk.W, padx=10, pady=(10, 0))
 
@@ -7,6 +7,7 @@ from models import DailyProgress, AbilityTag, Task
 from utils import display_error, display_info
 from datetime import datetime, timedelta
 import webbrowser
+from views.tree_sync import TreeSync
 
 class DailyProgressView:
     def __init__(self, parent, data_manager, abilities):
@@ -22,6 +23,10 @@ class DailyProgressView:
         self.create_widgets()
         self.refresh_treeview()
 
+        # 任务或项目的进度变化后重新统计
+        self.data_manager.subscribe('tasks', self.refresh_treeview)
+        self.data_manager.subscribe('projects', self.refresh_treeview)
+
     def create_widgets(self):
         # 按钮框架
         buttons_frame = ttk.Frame(self.frame)
@@ -66,6 +71,7 @@ class DailyProgressView:
         self.tree.tag_configure('evenrow', background='#e0f0f5')
 
         self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree_sync = TreeSync(self.tree)
 
         # 绑定事件
         self.tree.bind("<Double-1>", self.on_double_click)
@@ -77,48 +83,29 @@ class DailyProgressView:
         self.daily_progress_list = self.data_manager.load_daily_progress()
         self.tasks = self.data_manager.load_tasks()
 
-        # 清空现有的树视图内容
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         # 按日期排序
         sorted_progress = sorted(self.daily_progress_list, key=lambda dp: dp.progress_date, reverse=True)
-        
-        # 预计算每个日期完成的任务及其详情
-        self.completed_tasks_details = {}
-        for entry in sorted_progress:
-            completed_tasks = self.get_tasks_completed_on(entry.progress_date)
-            self.completed_tasks_details[entry.progress_date] = completed_tasks
-
-            # 更新 tasks_completed 为当天完成的任务数
-            entry.tasks_completed = len(completed_tasks)
 
-        # 插入数据到Treeview，应用斑马条纹
+        # 按日期作为行的 iid 只更新有变化的行，应用斑马条纹
+        rows = []
         for idx, entry in enumerate(sorted_progress):
             tags_str = ", ".join([tag.name for tag in entry.tags]) if entry.tags else "无"
             notes_preview = entry.notes if entry.notes else "无"
             row_tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-            self.tree.insert('', tk.END, values=(
+            rows.append((entry.progress_date, (
                 entry.progress_date,
                 entry.tasks_completed,
                 "查看详情",
                 notes_preview,
                 tags_str
-            ), tags=(row_tag,))
+            ), (row_tag,)))
+        self.tree_sync.sync(rows)
 
     def get_tasks_completed_on(self, date_str):
         """
-        获取某天完成的所有任务。
+        获取某天完成的所有任务和项目（每个只计一次）。
         """
-        completed_tasks = []
-        for task in self.tasks:
-            for progress_entry in task.progress_history:
-                timestamp, description, progress = progress_entry
-                entry_date = timestamp.split(' ')[0]  # 提取日期部分
-                if entry_date == date_str and progress == 100:
-                    completed_tasks.append(task.name)
-                    break  # 一个任务只计一次
-        return completed_tasks
+        return self.data_manager.get_progress_index().completed_on(date_str)
 
     def add_edit_note(self):
         selected_item = self.tree.selection()
@@ -154,7 +141,7 @@ class DailyProgressView:
         if col_index == 3:
             values = self.tree.item(item_id, 'values')
             progress_date = values[0]
-            completed_tasks = self.completed_tasks_details.get(progress_date, [])
+            completed_tasks = self.get_tasks_completed_on(progress_date)
 
             if not completed_tasks:
                 display_info("信息", f"{progress_date} 没有完成的任务。")
@@ -179,19 +166,16 @@ class DailyProgressView:
             tasks_listbox.pack(fill='both', expand=True, padx=10, pady=10)
 
             for task in completed_tasks:
-                tasks_listbox.insert(tk.END, task)
+                tasks_listbox.insert(tk.END, task.name)
 
             # 任务详细信息页（可扩展）
             details_frame = ttk.Frame(notebook)
             notebook.add(details_frame, text="任务详情")
 
-            if completed_tasks:
-                selected_task = completed_tasks[0]
-                task = next((t for t in self.tasks if t.name == selected_task), None)
-                if task:
-                    ttk.Label(details_frame, text=f"任务名称: {task.name}", font=("Microsoft YaHei", 12)).pack(pady=5, anchor='w')
-                    ttk.Label(details_frame, text=f"描述: {task.description}", font=("Microsoft YaHei", 12)).pack(pady=5, anchor='w')
-                    ttk.Label(details_frame, text=f"关联能力标签: {', '.join([tag.name for tag in task.abilities]) if task.abilities else '无'}", font=("Microsoft YaHei", 12)).pack(pady=5, anchor='w')
+            task = completed_tasks[0]
+            ttk.Label(details_frame, text=f"任务名称: {task.name}", font=("Microsoft YaHei", 12)).pack(pady=5, anchor='w')
+            ttk.Label(details_frame, text=f"描述: {task.description}", font=("Microsoft YaHei", 12)).pack(pady=5, anchor='w')
+            ttk.Label(details_frame, text=f"关联能力标签: {', '.join([tag.name for tag in task.abilities]) if task.abilities else '无'}", font=("Microsoft YaHei", 12)).pack(pady=5, anchor='w')
 
             close_button = ttk.Button(detail_window, text="关闭", command=detail_window.destroy, style="Rounded.TButton")
             close_button.pack(pady=10)
@@ -204,6 +188,6 @@ class DailyProgressView:
 
     def get_tasks_completed_on_date(self, date_str):
         """
-        获取某一天完成的任务列表。
+        获取某一天完成的任务名称列表。
         """
-        return self.completed_tasks_details.get(date_str, [])
+        return [task.name for task in self.get_tasks_completed_on(date_str)]
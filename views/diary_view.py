@@ -5,10 +5,18 @@ from tkinter import messagebox, ttk, simpledialog
 from tkcalendar import Calendar
 from models import DiaryEntry, AbilityTag
 from utils import display_error, display_info
+from diary_index import DiaryIndex
 from datetime import datetime, date
 import webbrowser
 
 class DiaryView:
+    # 日记分类 -> (日历标签名, 颜色)；其它分类使用默认标签
+    CATEGORY_TAGS = {
+        "感兴趣的技术": ('diary_tech', "#1E90FF"),  # 道奇蓝
+        "课外课程": ('diary_extra', "#32CD32"),  # 石灰绿
+    }
+    DEFAULT_TAG = ('diary', "#FF6347")  # 番茄红
+
     def __init__(self, parent, data_manager, abilities):
         """
         初始化日记视图。
@@ -21,6 +29,7 @@ class DiaryView:
         self.data_manager = data_manager
         self.abilities = abilities  # List of AbilityTag objects
         self.diary_entries = self.data_manager.load_diary_entries()
+        self.diary_index = DiaryIndex(self.diary_entries)  # 日期 -> 日记
 
         self.frame = ttk.Frame(self.parent)
         self.frame.pack(fill='both', expand=True)
@@ -66,6 +75,12 @@ class DiaryView:
                                       selectforeground="white")
         self.diary_calendar.pack(padx=10, pady=10)
         self.diary_calendar.bind("<<CalendarSelected>>", self.on_diary_date_selected)
+        # 翻页时只标记新显示的月份
+        self.diary_calendar.bind("<<CalendarMonthChanged>>", lambda event: self.mark_diary_dates())
+
+        # 每个分类一个日历标签，只配置一次
+        for tag, color in list(self.CATEGORY_TAGS.values()) + [self.DEFAULT_TAG]:
+            self.diary_calendar.tag_config(tag, background=color, foreground='white', font=("Microsoft YaHei", 10, "bold"))
 
         self.mark_diary_dates()
 
@@ -77,20 +92,21 @@ class DiaryView:
 
     def mark_diary_dates(self):
         """
-        在日历上标记有日记的日期。
-        使用不同颜色或图标区分不同类型的日记。
+        在日历上标记当前显示月份中有日记的日期。
+        不同分类的日记使用不同的标签（颜色）区分。
         """
         self.diary_calendar.calevent_remove('all')
-        for entry in self.diary_entries:
-            entry_date = entry.entry_date  # 已经是 datetime.date 对象
-            # 使用不同的颜色根据分类标签
-            color = "#FF6347"  # 默认为番茄红
-            if entry.category == "感兴趣的技术":
-                color = "#1E90FF"  # 道奇蓝
-            elif entry.category == "课外课程":
-                color = "#32CD32"  # 石灰绿
-            self.diary_calendar.calevent_create(entry_date, 'diary', 'circle')
-            self.diary_calendar.tag_config('diary', background=color, foreground='white', font=("Microsoft YaHei", 10, "bold"))
+        month, year = self.diary_calendar.get_displayed_month()
+        for entry in self.diary_index.month(year, month):
+            self.mark_diary_entry(entry)
+
+    def mark_diary_entry(self, entry):
+        """为一篇日记添加日历事件；不在当前显示月份的日记留到翻到该月时再标记。"""
+        month, year = self.diary_calendar.get_displayed_month()
+        if not entry.entry_date or (entry.entry_date.year, entry.entry_date.month) != (year, month):
+            return
+        tag = self.CATEGORY_TAGS.get(entry.category, self.DEFAULT_TAG)[0]
+        self.diary_calendar.calevent_create(entry.entry_date, 'diary', tag)
 
     def open_add_diary_window(self):
         """
@@ -182,11 +198,11 @@ class DiaryView:
             messagebox.showwarning("警告", "日记内容不能为空！")
             return
 
-        # 检查是否已存在该日期的日记
-        for entry in self.diary_entries:
-            if entry.entry_date == self.diary_calendar.get_date():
-                display_error("警告", "该日期的日记已存在！")
-                return
+        # 检查是否已存在该日期的日记（日历返回的是字符串，先转换为 date 再比较）
+        selected_date = datetime.strptime(self.diary_calendar.get_date(), '%Y-%m-%d').date()
+        if self.diary_index.get(selected_date):
+            display_error("警告", "该日期的日记已存在！")
+            return
 
         # 处理自定义标签
         tags = selected_tags.copy()
@@ -196,22 +212,22 @@ class DiaryView:
             if not existing_tag:
                 # 创建新的 AbilityTag
                 new_tag = AbilityTag(name=custom_tag)
-                self.abilities.append(new_tag)
-                self.data_manager.save_abilities(self.abilities)
+                self.data_manager.add_ability(new_tag)
                 tags.append(new_tag)
             else:
                 tags.append(existing_tag)
 
         new_entry = DiaryEntry(
-            entry_date=self.diary_calendar.get_date(),
+            entry_date=selected_date,
             summary=summary,
             category=category,
             tags=tags,  # 使用 tags 参数
             links=links
         )
         self.diary_entries.append(new_entry)
+        self.diary_index.add(new_entry)
         self.data_manager.save_diary_entries(self.diary_entries)
-        self.mark_diary_dates()
+        self.mark_diary_entry(new_entry)
         window.destroy()
         display_info("成功", "日记已添加。")
 
@@ -221,10 +237,10 @@ class DiaryView:
         """
         selected_date_str = self.diary_calendar.get_date()
         selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
-        for entry in self.diary_entries:
-            if entry.entry_date == selected_date:
-                self.open_view_diary_window(entry)
-                return
+        entry = self.diary_index.get(selected_date)
+        if entry:
+            self.open_view_diary_window(entry)
+            return
         messagebox.showinfo("提示", "该日期暂无日记。")
 
     def view_diary(self):
@@ -233,10 +249,10 @@ class DiaryView:
         """
         selected_date_str = self.diary_calendar.get_date()
         selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
-        for entry in self.diary_entries:
-            if entry.entry_date == selected_date:
-                self.open_view_diary_window(entry)
-                return
+        entry = self.diary_index.get(selected_date)
+        if entry:
+            self.open_view_diary_window(entry)
+            return
         messagebox.showinfo("提示", "该日期暂无日记。")
 
     def open_view_diary_window(self, entry):
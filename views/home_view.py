@@ -1,10 +1,10 @@
 # views/home_view.py
-import tkinter as tk
 from tkinter import messagebox, ttk
 from models import Project, AbilityTag
 from utils import display_error, display_info, display_warning
 from tkcalendar import Calendar
 from datetime import datetime
+from views.tree_sync import TreeSync
 
 class HomeView:
     def __init__(self, parent, data_manager, abilities):
@@ -41,18 +41,10 @@ class HomeView:
             else:
                 self.tree.column(col, width=100)
         self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree_sync = TreeSync(self.tree)
 
         # 添加任务到 Treeview
-        for task in self.tasks:
-            abilities_str = ", ".join([ability.name for ability in task.ability]) if task.ability else "无"
-            self.tree.insert('', tk.END, values=(
-                task.name,
-                task.due_date,
-                abilities_str,
-                task.description,
-                f"{task.progress}%",
-                "是"  # 作为项目的标记
-            ))
+        self.refresh_treeview()
 
         # 绑定双击事件
         self.tree.bind("<Double-1>", self.on_double_click)
@@ -60,12 +52,8 @@ class HomeView:
     def on_double_click(self, event):
         selected_item = self.tree.selection()
         if selected_item:
-            item = self.tree.item(selected_item)
-            task_values = item['values']
-            task_name = task_values[0]
-
-            # 找到对应的任务对象
-            task = next((t for t in self.tasks if t.name == task_name), None)
+            # 行的 iid 就是任务 id
+            task = self.data_manager.get_task(selected_item[0])
             if task:
                 self.mark_task_as_project(task)
             else:
@@ -122,15 +110,15 @@ class HomeView:
         """
         刷新任务列表的Treeview。
         """
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        rows = []
         for task in self.tasks:
             abilities_str = ", ".join([ability.name for ability in task.ability]) if task.ability else "无"
-            self.tree.insert('', tk.END, values=(
+            rows.append((task.id, (
                 task.name,
                 task.due_date,
                 abilities_str,
                 task.description,
                 f"{task.progress}%",
                 "是"  # 作为项目的标记
-            ))
+            )))
+        self.tree_sync.sync(rows)
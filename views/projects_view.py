@@ -4,6 +4,7 @@ from tkinter import messagebox, ttk, simpledialog
 from models import Project, AbilityTag
 from utils import display_error, display_info, display_warning
 from tkcalendar import Calendar
+from views.tree_sync import TreeSync
 
 class ProjectsView:
     def __init__(self, parent, data_manager, abilities):
@@ -24,6 +25,9 @@ class ProjectsView:
 
         self.create_widgets()
 
+        # 任务页面更新项目进度后刷新列表
+        self.data_manager.subscribe('projects', self.refresh_treeview)
+
     def create_widgets(self):
         # 按钮框架
         buttons_frame = tk.Frame(self.frame)
@@ -57,6 +61,7 @@ class ProjectsView:
                 self.tree.column(col, width=100)
 
         self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree_sync = TreeSync(self.tree)
 
         self.refresh_treeview()
 
@@ -64,19 +69,20 @@ class ProjectsView:
         """
         刷新项目列表的Treeview。
         """
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        rows = []
         for project in self.projects:
             abilities_str = ", ".join([ability.name for ability in project.abilities])
             interest_str = f"{project.interest}★" if project.interest is not None else "无"
-            self.tree.insert('', tk.END, values=(
+            rows.append((project.id, (
                 project.name,
                 project.due_date,
                 abilities_str,
                 project.description,
                 f"{project.progress}%",
                 interest_str
-            ))
+            )))
+        # 只更新有变化的行，保留选中状态和滚动位置
+        self.tree_sync.sync(rows)
 
     def open_add_project_window(self):
         """
@@ -116,9 +122,8 @@ class ProjectsView:
 
         # 实现搜索功能
         def search_abilities(event):
-            search_term = search_entry.get().lower()
-            filtered_abilities = [tag.name for tag in self.abilities if search_term in tag.name.lower()]
-            abilities_var.set(filtered_abilities)
+            search_term = search_entry.get()
+            abilities_var.set(self.data_manager.get_ability_search_index().search(search_term))
 
         search_entry.bind("<KeyRelease>", search_abilities)
 
@@ -144,7 +149,8 @@ class ProjectsView:
             name = name_entry.get().strip()
             due_date = cal.get_date()
             selected_indices = abilities_listbox.curselection()
-            selected_abilities = [self.abilities[i] for i in selected_indices]
+            selected_abilities = self.data_manager.abilities_by_name(
+                abilities_listbox.get(i) for i in selected_indices)
             description = description_text.get("1.0", tk.END).strip()
             progress = progress_var.get()
             interest = interest_var.get() if interest_spin.get() else None
@@ -182,8 +188,7 @@ class ProjectsView:
                 messagebox.showinfo("提示", "该能力标签已存在。")
             else:
                 new_ability = AbilityTag(new_tag)
-                self.abilities.append(new_ability)
-                self.data_manager.save_abilities(self.abilities)
+                self.data_manager.add_ability(new_ability)
                 display_info("成功", "能力标签已添加。")
                 # 更新 Listbox 中的能力标签
                 abilities_listbox.insert(tk.END, new_tag)
@@ -195,8 +200,11 @@ class ProjectsView:
         """
         selected_item = self.tree.selection()
         if selected_item:
-            item_index = self.tree.index(selected_item)
-            project = self.projects[item_index]
+            project = self.data_manager.get_project(selected_item[0])
+
+            if not project:
+                display_error("错误", "未找到选中的项目。")
+                return
 
             edit_window = tk.Toplevel(self.parent)
             edit_window.title("修改项目")
@@ -240,9 +248,8 @@ class ProjectsView:
 
             # 实现搜索功能
             def search_abilities(event):
-                search_term = search_entry.get().lower()
-                filtered_abilities = [tag.name for tag in self.abilities if search_term in tag.name.lower()]
-                abilities_var.set(filtered_abilities)
+                search_term = search_entry.get()
+                abilities_var.set(self.data_manager.get_ability_search_index().search(search_term))
 
             search_entry.bind("<KeyRelease>", search_abilities)
 
@@ -269,7 +276,8 @@ class ProjectsView:
                 name = name_entry.get().strip()
                 due_date = cal.get_date()
                 selected_indices = abilities_listbox.curselection()
-                selected_abilities = [self.abilities[i] for i in selected_indices]
+                selected_abilities = self.data_manager.abilities_by_name(
+                    abilities_listbox.get(i) for i in selected_indices)
                 description = description_text.get("1.0", tk.END).strip()
                 progress = progress_var.get()
                 interest = interest_var.get() if interest_spin.get() else None
@@ -313,10 +321,14 @@ class ProjectsView:
         """
         selected_item = self.tree.selection()
         if selected_item:
+            project = self.data_manager.get_project(selected_item[0])
+            if not project:
+                display_error("错误", "未找到选中的项目。")
+                return
+
             confirm = messagebox.askyesno("确认", "确定要删除选中的项目吗？")
             if confirm:
-                item_index = self.tree.index(selected_item)
-                del self.projects[item_index]
+                self.projects.remove(project)
                 self.data_manager.save_projects(self.projects)
                 self.refresh_treeview()
                 display_info("成功", "项目已删除。")
@@ -329,8 +341,11 @@ class ProjectsView:
         """
         selected_item = self.tree.selection()
         if selected_item:
-            item_index = self.tree.index(selected_item)
-            project = self.projects[item_index]
+            project = self.data_manager.get_project(selected_item[0])
+
+            if not project:
+                display_error("错误", "未找到选中的项目。")
+                return
 
             view_window = tk.Toplevel(self.parent)
             view_window.title(f"项目详情: {project.name}")
@@ -2,23 +2,44 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from datetime import datetime, timedelta
-import random
+from datetime import date, datetime
 from models import AbilityTag, KnowledgePoint
 from data_manager import DataManager
+from recall_scheduler import RecallScheduler
+from sampling import SamplingPool
+import spaced_repetition
 
 class RecallView:
+    BATCH_SIZE = 6
+    # 抽样方式 -> SamplingPool 的权重方案（None 为等概率）
+    SAMPLING_MODES = {"随机": None, "按能力均衡": 'ability', "按兴趣": 'interest'}
+
     def __init__(self, parent, data_manager):
         self.parent = parent
         self.data_manager = data_manager
         self.abilities = self.data_manager.load_abilities()
         self.projects = self.data_manager.load_projects()
+        self.scheduler = RecallScheduler()
+        self.kp_abilities = {}  # 知识点 id -> 所属能力名称
+        # 未学习的知识点，换一批时只抽样不打乱
+        self.unlearned_pool = SamplingPool(key=lambda kp: kp.id, weightings={
+            'ability': self.ability_weights,
+            'interest': self.interest_weights,
+        })
+        self.due_recall_kps = []
+        self._saving = False  # 本视图自己保存时不必响应变更通知
         
         self.frame = ttk.Frame(self.parent)
         self.frame.pack(fill='both', expand=True)
         
         self.create_widgets()
         self.load_recall_data()
+
+        # 能力标签页面修改知识点后重新加载
+        self.data_manager.subscribe('abilities', self.on_abilities_changed)
+        # 兴趣程度变化后按兴趣抽样的权重随之变化
+        self.data_manager.subscribe('projects', self.unlearned_pool.invalidate_weights)
+        self.data_manager.subscribe('tasks', self.unlearned_pool.invalidate_weights)
     
     def create_widgets(self):
         label = tk.Label(self.frame, text="知识点回忆", font=("Microsoft YaHei", 16))
@@ -28,7 +49,7 @@ class RecallView:
         recall_frame = ttk.LabelFrame(self.frame, text="需要回忆的知识点")
         recall_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
-        self.recall_listbox = tk.Listbox(recall_frame, width=100, height=10)
+        self.recall_listbox = tk.Listbox(recall_frame, width=100, height=10, selectmode='extended')
         self.recall_listbox.pack(side=tk.LEFT, fill='both', expand=True, padx=(0, 10), pady=5)
         
         recall_scrollbar = ttk.Scrollbar(recall_frame, orient="vertical", command=self.recall_listbox.yview)
@@ -38,8 +59,11 @@ class RecallView:
         recall_buttons_frame = tk.Frame(recall_frame)
         recall_buttons_frame.pack(side=tk.LEFT, fill='y', pady=5)
         
-        mark_recalled_button = tk.Button(recall_buttons_frame, text="标记为已回忆", command=self.mark_as_recalled)
-        mark_recalled_button.pack(pady=5)
+        # 按回忆效果评分，可一次给多个选中的知识点评分
+        for grade_label, grade in spaced_repetition.GRADES.items():
+            grade_button = tk.Button(recall_buttons_frame, text=grade_label, width=8,
+                                     command=lambda _grade=grade: self.mark_as_recalled(_grade))
+            grade_button.pack(pady=2)
         
         add_ability_button_recall = tk.Button(recall_buttons_frame, text="添加能力标签", command=lambda: self.add_ability_tag(recall_frame))
         add_ability_button_recall.pack(pady=5)
@@ -66,6 +90,13 @@ class RecallView:
         
         change_batch_button = tk.Button(unlearned_buttons_frame, text="换一批", command=self.change_batch)
         change_batch_button.pack(pady=5)
+
+        # 抽样方式
+        self.sampling_mode_var = tk.StringVar(value="随机")
+        sampling_mode_combobox = ttk.Combobox(unlearned_buttons_frame, textvariable=self.sampling_mode_var,
+                                              values=list(self.SAMPLING_MODES), state='readonly', width=10)
+        sampling_mode_combobox.pack(pady=5)
+        sampling_mode_combobox.bind("<<ComboboxSelected>>", lambda event: self.change_batch())
         
         # add_ability_button_unlearned = tk.Button(unlearned_buttons_frame, text="添加能力标签", command=lambda: self.add_ability_tag(unlearned_frame))
         # add_ability_button_unlearned.pack(pady=5)
@@ -73,57 +104,106 @@ class RecallView:
         # 绑定双击事件以查看未学习知识点详情（可选）
         self.unlearned_listbox.bind("<Double-1>", self.on_double_click_unlearned)
     
+    def on_abilities_changed(self):
+        if not self._saving:
+            self.load_recall_data()
+
+    def save_abilities(self):
+        """保存知识点的修改；列表已由调用方增量更新，忽略由此触发的变更通知。"""
+        self._saving = True
+        try:
+            self.data_manager.save_abilities(self.abilities)
+        finally:
+            self._saving = False
+
     def load_recall_data(self):
-        today_str = datetime.now().strftime('%Y-%m-%d')
+        # 已学习的知识点按下次回忆日期建堆
+        self.scheduler.rebuild(self.abilities)
         self.due_recall_kps = []
-        self.unlearned_kps = []
-        
-        # 遍历所有能力标签和知识点
+        self.recall_listbox.delete(0, tk.END)
+        self.show_due_recall()
+
+        self.kp_abilities = {}
+        unlearned_kps = []
         for ability in self.abilities:
             for kp in ability.knowledge_points:
-                if kp.learned and kp.next_recall:
-                    if kp.next_recall <= today_str:
-                        self.due_recall_kps.append((ability.name, kp))
-                elif not kp.learned:
-                    self.unlearned_kps.append(kp)
-        
-        # 展示需要回忆的知识点
-        self.recall_listbox.delete(0, tk.END)
-        for ability_name, kp in self.due_recall_kps:
-            last_recall = kp.last_recall if kp.last_recall else "无"
-            next_recall = kp.next_recall if kp.next_recall else "无"
-            self.recall_listbox.insert(tk.END, f"能力标签: {ability_name} | 知识点: {kp.content} | 上次回忆: {last_recall} | 下次回忆: {next_recall}")
-        
+                self.kp_abilities[kp.id] = ability.name
+                if not kp.learned:
+                    unlearned_kps.append(kp)
+        self.unlearned_pool.rebuild(unlearned_kps)
+
         # 随机选择6个未学习的知识点
-        random.shuffle(self.unlearned_kps)
-        self.today_unlearned_kps = self.unlearned_kps[:6]
+        self.show_unlearned_batch()
+
+    def show_unlearned_batch(self):
+        """按当前的抽样方式抽取一批未学习的知识点并展示。"""
+        weighting = self.SAMPLING_MODES.get(self.sampling_mode_var.get())
+        self.today_unlearned_kps = self.unlearned_pool.sample(self.BATCH_SIZE, weighting)
         
         # 展示未学习的知识点
         self.unlearned_listbox.delete(0, tk.END)
         for kp in self.today_unlearned_kps:
             self.unlearned_listbox.insert(tk.END, f"知识点: {kp.content}")
+
+    def ability_weights(self, kps):
+        """按能力均衡：每个能力标签被抽中的机会相同，与它有多少个未学习的知识点无关。"""
+        counts = {}
+        for kp in kps:
+            name = self.kp_abilities.get(kp.id)
+            counts[name] = counts.get(name, 0) + 1
+        return [1.0 / counts[self.kp_abilities.get(kp.id)] for kp in kps]
+
+    def interest_weights(self, kps):
+        """按兴趣：知识点的权重为使用其能力标签的任务和项目中最高的兴趣程度（没有时为 1）。"""
+        interest = {}
+        for item in self.data_manager.load_tasks() + self.projects:
+            for ability in item.abilities:
+                interest[ability.name] = max(interest.get(ability.name, 1), item.interest or 1)
+        return [interest.get(self.kp_abilities.get(kp.id), 1) for kp in kps]
+
+    def show_due_recall(self):
+        """从堆顶取出今天新到期的知识点，追加到回忆列表末尾。"""
+        today_str = datetime.now().strftime('%Y-%m-%d')
+        for ability_name, kp in self.scheduler.pop_due(today_str):
+            self.due_recall_kps.append((ability_name, kp))
+            last_recall = kp.last_recall if kp.last_recall else "无"
+            next_recall = kp.next_recall if kp.next_recall else "无"
+            self.recall_listbox.insert(tk.END, f"能力标签: {ability_name} | 知识点: {kp.content} | 上次回忆: {last_recall} | 下次回忆: {next_recall}")
     
-    def mark_as_recalled(self):
+    def mark_as_recalled(self, grade):
+        """
+        按评分更新选中的知识点（SM-2），整批一起计算。
+
+        :param grade: 回忆评分（0-5），见 spaced_repetition.GRADES
+        """
         selected_indices = self.recall_listbox.curselection()
         if not selected_indices:
             messagebox.showwarning("警告", "请选择要标记为已回忆的知识点。")
             return
         
-        index = selected_indices[0]
-        ability_name, kp = self.due_recall_kps[index]
-        
-        # 更新知识点的 last_recall 和 next_recall
-        today = datetime.now().date()
-        kp.last_recall = today.strftime('%Y-%m-%d')
-        kp.next_recall = self.calculate_next_recall_date(today, kp).strftime('%Y-%m-%d')
+        selected = [self.due_recall_kps[index] for index in selected_indices]
+        today = date.today()
+        intervals = spaced_repetition.review([kp for _, kp in selected], grade, today)
+        self.data_manager.record_recalls([(kp.id, today, grade, interval)
+                                          for (_, kp), interval in zip(selected, intervals)])
+
+        # 按新的日期重新入堆，只从列表中删掉这些行（从后往前删，前面的行号不受影响）
+        for ability_name, kp in selected:
+            self.scheduler.schedule(ability_name, kp)
+        for index in sorted(selected_indices, reverse=True):
+            del self.due_recall_kps[index]
+            self.recall_listbox.delete(index)
         
         # 保存数据
-        self.data_manager.save_abilities(self.abilities)
+        self.save_abilities()
         
-        messagebox.showinfo("成功", f"知识点 '{kp.content}' 已标记为已回忆。")
+        if len(selected) == 1:
+            kp = selected[0][1]
+            messagebox.showinfo("成功", f"知识点 '{kp.content}' 已标记为已回忆，下次回忆: {kp.next_recall}。")
+        else:
+            messagebox.showinfo("成功", f"{len(selected)} 个知识点已标记为已回忆。")
         
-        # 重新加载数据
-        self.load_recall_data()
+        self.show_due_recall()
     
     def start_learning(self):
         selected_indices = self.unlearned_listbox.curselection()
@@ -131,68 +211,30 @@ class RecallView:
             messagebox.showwarning("警告", "请选择要开始学习的知识点。")
             return
         
-        for index in selected_indices:
-            kp = self.today_unlearned_kps[index]
-            kp.learned = True
-            today = datetime.now().date()
-            kp.last_recall = today.strftime('%Y-%m-%d')
-            kp.next_recall = (today + timedelta(days=1)).strftime('%Y-%m-%d')  # 初始回忆设为1天后
+        # 从后往前删除，前面的行号不受影响
+        for index in sorted(selected_indices, reverse=True):
+            kp = self.today_unlearned_kps.pop(index)
+            spaced_repetition.start_learning(kp)  # 初始回忆设为1天后
+            self.scheduler.schedule(self.kp_abilities.get(kp.id), kp)
+            self.unlearned_pool.remove(kp)
+            self.unlearned_listbox.delete(index)
         
         # 保存数据
-        self.data_manager.save_abilities(self.abilities)
+        self.save_abilities()
         
         messagebox.showinfo("成功", "选定的知识点已标记为已学习。")
-        
-        # 重新加载数据
-        self.load_recall_data()
+
+        self.show_due_recall()
     
     def change_batch(self):
         """
         换一批新的未学习知识点。
         """
-        if not self.unlearned_kps:
+        if not self.unlearned_pool:
             messagebox.showinfo("提示", "没有更多的未学习知识点可供选择。")
             return
         
-        random.shuffle(self.unlearned_kps)
-        self.today_unlearned_kps = self.unlearned_kps[:6]
-        
-        # 展示未学习的知识点
-        self.unlearned_listbox.delete(0, tk.END)
-        for kp in self.today_unlearned_kps:
-            self.unlearned_listbox.insert(tk.END, f"知识点: {kp.content}")
-    
-    def calculate_next_recall_date(self, last_recall_date, kp):
-        """
-        根据艾宾浩斯遗忘曲线计算下次回忆的日期。
-        简单的间隔列表，用户每次回忆成功后，下次回忆间隔翻倍。
-        """
-        # 定义回忆间隔（天）
-        intervals = [1, 2, 4, 7, 15, 30, 60, 90]
-        
-        # 计算已经回忆的次数
-        if not kp.last_recall:
-            count = 0
-        else:
-            # 从 kp.last_recall 到 now，计算已经回忆了几次
-            count = 0
-            # 假设每次回忆成功后，间隔翻倍
-            # 实际应用中可能需要更复杂的逻辑
-            last_recall_date_obj = datetime.strptime(kp.last_recall, '%Y-%m-%d').date()
-            days_since_last = (last_recall_date - last_recall_date_obj).days
-            for interval in intervals:
-                if days_since_last >= interval:
-                    count += 1
-                else:
-                    break
-        
-        # 选择下一个回忆间隔
-        if count < len(intervals):
-            next_interval = intervals[count]
-        else:
-            next_interval = intervals[-1]  # 最长间隔
-        
-        return last_recall_date + timedelta(days=next_interval)
+        self.show_unlearned_batch()
     
     def on_double_click_recall(self, event):
         selected_indices = self.recall_listbox.curselection()
@@ -216,10 +258,8 @@ class RecallView:
             messagebox.showerror("错误", f"无法找到知识点 '{kp.content}' 的所属能力标签。")
     
     def find_ability_of_kp(self, kp):
-        for ability in self.abilities:
-            if kp in ability.knowledge_points:
-                return ability.name
-        return None
+        ability = self.data_manager.get_ability_of_knowledge_point(kp.id)
+        return ability.name if ability else None
     
     def open_kp_details_window(self, ability_name, kp):
         """
@@ -227,7 +267,7 @@ class RecallView:
         """
         details_window = tk.Toplevel(self.parent)
         details_window.title(f"知识点详情 - {kp.content}")
-        details_window.geometry("400x300")
+        details_window.geometry("400x380")
         details_window.grab_set()  # 模态窗口
         
         # 知识点信息
@@ -240,6 +280,13 @@ class RecallView:
         next_recall = kp.next_recall if kp.next_recall else "无"
         tk.Label(info_frame, text=f"上次回忆: {last_recall}", font=("Microsoft YaHei", 11)).pack(anchor='w', pady=5)
         tk.Label(info_frame, text=f"下次回忆: {next_recall}", font=("Microsoft YaHei", 11)).pack(anchor='w', pady=5)
+        tk.Label(info_frame, text=f"难度系数: {kp.ease} | 连续成功: {kp.repetitions} | 遗忘次数: {kp.lapses}", font=("Microsoft YaHei", 11)).pack(anchor='w', pady=5)
+
+        # 回忆记录和所属能力子树近 90 天的记忆保持率
+        recall_count = len(self.data_manager.get_recall_log().history(kp.id))
+        reviews, rate = self.data_manager.retention_by_ability(days=90).get(ability_name, (0, None))
+        rate_str = f"{rate:.0%}（{reviews} 次）" if rate is not None else "无"
+        tk.Label(info_frame, text=f"回忆记录: {recall_count} 次 | 近90天保持率: {rate_str}", font=("Microsoft YaHei", 11)).pack(anchor='w', pady=5)
         
         # 能力标签链
         chain = self.get_ability_chain(ability_name)
@@ -254,15 +301,7 @@ class RecallView:
         """
         获取能力标签的链，从当前能力标签到根能力标签。
         """
-        chain = []
-        current_name = ability_name
-        while current_name:
-            chain.append(current_name)
-            ability = next((a for a in self.abilities if a.name == current_name), None)
-            if ability and ability.parent:
-                current_name = ability.parent
-            else:
-                current_name = None
+        chain = self.data_manager.get_ability_tree().ancestors(ability_name)
         return chain[::-1]  # 从根到当前能力标签
     
     def add_ability_tag(self, parent_window):
@@ -288,8 +327,7 @@ class RecallView:
                     parent_selected = None
                 
                 new_ability = AbilityTag(name=new_tag, parent=parent_selected)
-                self.abilities.append(new_ability)
-                self.data_manager.save_abilities(self.abilities)
+                self.data_manager.add_ability(new_ability)
                 messagebox.showinfo("成功", "能力标签已添加。")
                 
                 # 更新列表框中的能力标签
@@ -0,0 +1,111 @@
+# views/search_view.py
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+
+class SearchView:
+    # 文档类型 -> 显示名称
+    KIND_LABELS = {
+        'task': '任务',
+        'project': '项目',
+        'diary': '日记',
+        'summary': '总结',
+        'kp': '知识点',
+    }
+
+    def __init__(self, parent, data_manager):
+        """
+        初始化全文检索视图，可同时搜索日记、任务与项目描述、阶段性总结和知识点。
+
+        :param parent: 父容器
+        :param data_manager: 数据仓库实例
+        """
+        self.parent = parent
+        self.data_manager = data_manager
+        self.results = {}  # Treeview 行 iid -> (文档类型, 对象)
+
+        self.frame = ttk.Frame(self.parent)
+        self.frame.pack(fill='both', expand=True)
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        # 搜索框架
+        search_frame = tk.Frame(self.frame)
+        search_frame.pack(pady=10)
+
+        tk.Label(search_frame, text="关键字:").pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda event: self.search())
+
+        search_button = tk.Button(search_frame, text="搜索", command=self.search)
+        search_button.pack(side=tk.LEFT, padx=5)
+
+        # Treeview（搜索结果）
+        columns = ("Type", "Title", "Snippet", "Score")
+        self.tree = ttk.Treeview(self.frame, columns=columns, show='headings', selectmode='browse')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            if col == "Snippet":
+                self.tree.column(col, width=400)
+            elif col in ("Type", "Score"):
+                self.tree.column(col, width=80)
+            else:
+                self.tree.column(col, width=150)
+        self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        # 绑定双击事件以查看详情
+        self.tree.bind("<Double-1>", self.on_double_click)
+
+    @staticmethod
+    def describe(kind, obj):
+        """返回 (标题, 正文)。"""
+        if kind in ('task', 'project'):
+            return obj.name, obj.description
+        if kind == 'diary':
+            entry_date = obj.entry_date.strftime('%Y-%m-%d') if obj.entry_date else ''
+            return entry_date, obj.summary
+        if kind == 'summary':
+            return obj.title, obj.content
+        return obj.content, obj.content
+
+    @staticmethod
+    def snippet(text, query, width=40):
+        """截取正文中关键字附近的一段文字。"""
+        text = ' '.join(text.split())
+        position = text.lower().find(query.lower())
+        start = max(position - width // 2, 0) if position >= 0 else 0
+        prefix = '…' if start > 0 else ''
+        suffix = '…' if start + width < len(text) else ''
+        return prefix + text[start:start + width] + suffix
+
+    def search(self):
+        query = self.search_var.get().strip()
+        self.tree.delete(*self.tree.get_children())
+        self.results = {}
+        if not query:
+            messagebox.showwarning("警告", "请输入搜索关键字！")
+            return
+
+        for kind, obj, score in self.data_manager.search(query):
+            title, body = self.describe(kind, obj)
+            item = self.tree.insert('', tk.END, values=(
+                self.KIND_LABELS[kind],
+                title,
+                self.snippet(body, query),
+                f"{score:.2f}"
+            ))
+            self.results[item] = (kind, obj)
+
+        if not self.results:
+            messagebox.showinfo("提示", "没有找到相关内容。")
+
+    def on_double_click(self, event):
+        selected_item = self.tree.selection()
+        if not selected_item or selected_item[0] not in self.results:
+            return
+        kind, obj = self.results[selected_item[0]]
+        title, body = self.describe(kind, obj)
+        messagebox.showinfo(f"{self.KIND_LABELS[kind]}详情", f"{title}\n\n{body}")
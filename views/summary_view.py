@@ -4,6 +4,7 @@ from tkinter import messagebox, ttk
 from models import PeriodicSummary
 from utils import display_error, display_info
 from tkcalendar import Calendar
+from views.tree_sync import TreeSync
 
 class SummaryView:
     def __init__(self, parent, data_manager):
@@ -48,6 +49,7 @@ class SummaryView:
                 self.tree.column(col, width=150)
 
         self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree_sync = TreeSync(self.tree)
 
         self.refresh_treeview()
 
@@ -55,14 +57,12 @@ class SummaryView:
         """
         刷新总结列表的Treeview。
         """
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for summary in self.summaries:
-            self.tree.insert('', tk.END, values=(
-                summary.title,
-                summary.summary_date,
-                summary.content
-            ))
+        # 行的 iid 为总结的 id，只更新有变化的行
+        self.tree_sync.sync([(summary.id, (
+            summary.title,
+            summary.summary_date,
+            summary.content
+        )) for summary in self.summaries])
 
     def open_add_summary_window(self):
         """
@@ -116,8 +116,10 @@ class SummaryView:
         """
         selected_item = self.tree.selection()
         if selected_item:
-            index = self.tree.index(selected_item)
-            summary = self.summaries[index]
+            summary = self.data_manager.get_summary(selected_item[0])
+            if not summary:
+                display_error("错误", "未找到选中的总结。")
+                return
 
             view_window = tk.Toplevel(self.parent)
             view_window.title(f"总结: {summary.title}")
@@ -144,8 +146,9 @@ class SummaryView:
         if selected_item:
             confirm = messagebox.askyesno("确认", "确定要删除选中的总结吗？")
             if confirm:
-                index = self.tree.index(selected_item)
-                del self.summaries[index]
+                summary = self.data_manager.get_summary(selected_item[0])
+                if summary in self.summaries:
+                    self.summaries.remove(summary)
                 self.data_manager.save_summaries(self.summaries)
                 self.refresh_treeview()
                 display_info("成功", "总结已删除。")
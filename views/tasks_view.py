@@ -3,9 +3,10 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog
 from tkcalendar import Calendar
-from models import Task, Project, AbilityTag  # 导入 Project 类
+from models import Task, Project, AbilityTag, sort_key  # 导入 Project 类
 from utils import display_error, display_info
 from datetime import datetime
+from views.virtual_list import VirtualTreeview
 
 class TasksView:
     def __init__(self, parent, data_manager, abilities):
@@ -18,10 +19,18 @@ class TasksView:
         self.frame = ttk.Frame(self.parent)
         self.frame.pack(fill='both', expand=True)
 
-        self.sorting_order = {}  # 记录每个列的排序顺序
+        self.sort_columns = []  # [(列名, 是否降序)]，最近点击的列优先，其余列依次作为次要排序键
+        self.rows = []  # 列表中显示的任务和项目（未完成的），按当前顺序
 
         self.create_widgets()
 
+        # 其它视图修改任务或项目后刷新列表
+        self.data_manager.subscribe('tasks', self.refresh_treeview)
+        self.data_manager.subscribe('projects', self.refresh_treeview)
+
+    # 可排序的列 -> 模型字段
+    SORT_FIELDS = {"Due Date": 'due_date', "Interest": 'interest', "Progress": 'progress'}
+
     def create_widgets(self):
         # 按钮框架
         buttons_frame = tk.Frame(self.frame)
@@ -44,7 +53,7 @@ class TasksView:
         self.tree = ttk.Treeview(self.frame, columns=columns, show='headings', selectmode='browse')
 
         for col in columns:
-            if col in ["Interest", "Progress", "Due Date"]:
+            if col in self.SORT_FIELDS:
                 self.tree.heading(col, text=col, command=lambda _col=col: self.sort_treeview(_col))
             else:
                 self.tree.heading(col, text=col)
@@ -59,7 +68,11 @@ class TasksView:
             else:
                 self.tree.column(col, width=100)
 
+        # 任务很多时只把可见区域附近的行放进 Treeview，滚动时再从内存中取
+        scrollbar = ttk.Scrollbar(self.frame, orient='vertical')
+        scrollbar.pack(side=tk.RIGHT, fill='y', pady=10)
         self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.virtual = VirtualTreeview(self.tree, scrollbar, self.row_values)
 
         self.refresh_treeview()
 
@@ -67,79 +80,57 @@ class TasksView:
         self.tree.bind("<Double-1>", self.on_double_click)
 
     def refresh_treeview(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         # Only include tasks and projects with progress less than 100%
-        for task in self.tasks:
-            if task.progress < 100:  # Filter condition
-                interest = task.interest if task.interest else 0
-                stars = '★' * interest + '☆' * (5 - interest)
-                task_type = "任务"
-                abilities_str = ", ".join([ability.name for ability in task.abilities]) if task.abilities else "无"
-                self.tree.insert('', tk.END, values=(
-                    task.name,
-                    task.due_date,
-                    stars,
-                    abilities_str,
-                    task.description,
-                    f"{task.progress}%",
-                    task_type
-                ))
-        
-        for project in self.projects:
-            if project.progress < 100:  # Filter condition
-                interest = project.interest if project.interest else 0
-                stars = '★' * interest + '☆' * (5 - interest)
-                abilities_str = ", ".join([ability.name for ability in project.abilities]) if project.abilities else "无"
-                self.tree.insert('', tk.END, values=(
-                    project.name,
-                    project.due_date,
-                    stars,
-                    abilities_str,
-                    project.description,
-                    f"{project.progress}%",
-                    "项目"
-                ))
-
+        self.rows = [task for task in self.tasks if task.progress < 100]
+        self.rows.extend(project for project in self.projects if project.progress < 100)
+        if self.sort_columns:
+            self.rows.sort(key=sort_key([(self.SORT_FIELDS[col], reverse) for col, reverse in self.sort_columns]))
+        self.virtual.set_items(self.rows)
+
+    def row_values(self, task):
+        """Treeview 中一行的各列的值；只在该行进入可见区域时计算。"""
+        interest = task.interest if task.interest else 0
+        stars = '★' * interest + '☆' * (5 - interest)
+        abilities_str = ", ".join([ability.name for ability in task.abilities]) if task.abilities else "无"
+        return (
+            task.name,
+            task.due_date,
+            stars,
+            abilities_str,
+            task.description,
+            f"{task.progress}%",
+            self.item_type(task)
+        )
 
     def sort_treeview(self, col):
-        # Determine sort order
-        if col in self.sorting_order and self.sorting_order[col] == "asc":
-            reverse = True
-            self.sorting_order[col] = "desc"
-        else:
-            reverse = False
-            self.sorting_order[col] = "asc"
-
-        # Fetch all items and sort them
-        data = []
-        for child in self.tree.get_children(''):
-            val = self.tree.set(child, col)
-            data.append((val, child))
-
-        if col == "Interest":
-            # Sort based on number of stars
-            data.sort(key=lambda t: t[0].count('★'), reverse=reverse)
-        elif col == "Progress":
-            # Sort numerically
-            try:
-                data.sort(key=lambda t: int(t[0].strip('%')), reverse=reverse)
-            except ValueError:
-                data.sort(key=lambda t: t[0], reverse=reverse)
-        elif col == "Due Date":
-            # Sort by date
-            try:
-                data.sort(key=lambda t: datetime.strptime(t[0], '%Y-%m-%d'), reverse=reverse)
-            except ValueError:
-                data.sort(key=lambda t: t[0], reverse=reverse)
-        else:
-            # For other columns, sort alphabetically
-            data.sort(key=lambda t: t[0].lower(), reverse=reverse)
+        """
+        按列排序。再次点击同一列切换升序/降序；之前排序过的列保留为次要排序键。
+        排序键取自模型中的字段（日期序数、整数进度和兴趣），不读取 Treeview 中显示的文字。
+        """
+        previous = dict(self.sort_columns)
+        reverse = not previous[col] if col in previous else False
+        self.sort_columns = [(col, reverse)] + [(c, r) for c, r in self.sort_columns if c != col]
+
+        for name in self.SORT_FIELDS:
+            arrow = ''
+            if name == col:
+                arrow = ' ▼' if reverse else ' ▲'
+            self.tree.heading(name, text=name + arrow)
+
+        self.refresh_treeview()
 
-        # Rearrange items in sorted positions
-        for index, (val, child) in enumerate(data):
-            self.tree.move(child, '', index)
+    @staticmethod
+    def item_type(item):
+        """行对应的对象是 "任务" 还是 "项目"。"""
+        return "项目" if isinstance(item, Project) else "任务"
+
+    def find_item(self, item_id):
+        """
+        根据 Treeview 行的 iid（即模型 id）找到对应的任务或项目。
+
+        :param item_id: 行的 iid
+        """
+        return self.data_manager.get_task(item_id) or self.data_manager.get_project(item_id)
 
     def on_double_click(self, event):
         self.view_task()
@@ -185,9 +176,8 @@ class TasksView:
 
         # 实现搜索功能
         def search_abilities(event):
-            search_term = search_entry.get().lower()
-            filtered_abilities = [tag.name for tag in self.abilities if search_term in tag.name.lower()]
-            abilities_var.set(filtered_abilities)
+            search_term = search_entry.get()
+            abilities_var.set(self.data_manager.get_ability_search_index().search(search_term))
 
         search_entry.bind("<KeyRelease>", search_abilities)  # 动态搜索功能
 
@@ -206,7 +196,8 @@ class TasksView:
                 interest = 0
 
             selected_indices = abilities_listbox.curselection()
-            selected_abilities = [self.abilities[i] for i in selected_indices]
+            selected_abilities = self.data_manager.abilities_by_name(
+                abilities_listbox.get(i) for i in selected_indices)
             description = description_text.get("1.0", tk.END).strip()
 
             if not name:
@@ -230,25 +221,19 @@ class TasksView:
                 messagebox.showinfo("提示", "该能力标签已存在。")
             else:
                 new_ability = AbilityTag(new_tag)
-                self.abilities.append(new_ability)
-                self.data_manager.save_abilities(self.abilities)
+                self.data_manager.add_ability(new_ability)
                 display_info("成功", "能力标签已添加。")
                 # 更新 Listbox 中的能力标签
                 abilities_listbox.insert(tk.END, new_tag)
     def edit_task(self):
-        selected_item = self.tree.selection()
+        selected_item = self.virtual.selection()
         if selected_item:
-            values = self.tree.item(selected_item, 'values')
-            task_name = values[0]
-            task_type = values[-1]
-            if task_type == "项目":
-                task = next((p for p in self.projects if p.name == task_name), None)
-            else:
-                task = next((t for t in self.tasks if t.name == task_name), None)
+            task = self.find_item(selected_item[0])
 
             if not task:
                 display_error("错误", "未找到选中的任务。")
                 return
+            task_type = self.item_type(task)
 
             edit_window = tk.Toplevel(self.parent)
             edit_window.title("修改任务")
@@ -297,9 +282,8 @@ class TasksView:
 
             # 实现搜索功能
             def search_abilities(event):
-                search_term = search_entry.get().lower()
-                filtered_abilities = [tag.name for tag in self.abilities if search_term in tag.name.lower()]
-                abilities_var.set(filtered_abilities)
+                search_term = search_entry.get()
+                abilities_var.set(self.data_manager.get_ability_search_index().search(search_term))
 
             search_entry.bind("<KeyRelease>", search_abilities)
 
@@ -324,7 +308,8 @@ class TasksView:
 
                 # 获取选择的多个能力标签
                 selected_indices = abilities_listbox.curselection()
-                selected_abilities = [self.abilities[i] for i in selected_indices]
+                selected_abilities = self.data_manager.abilities_by_name(
+                    abilities_listbox.get(i) for i in selected_indices)
 
                 description = description_text.get("1.0", tk.END).strip()
 
@@ -367,21 +352,19 @@ class TasksView:
             messagebox.showwarning("警告", "请选择要修改的任务！")
 
     def delete_task(self):
-        selected_item = self.tree.selection()
+        selected_item = self.virtual.selection()
         if selected_item:
-            values = self.tree.item(selected_item, 'values')
-            task_name = values[0]
-            task_type = values[-1]
+            task = self.find_item(selected_item[0])
+            if not task:
+                display_error("错误", "未找到选中的任务。")
+                return
+
+            task_type = self.item_type(task)
             if task_type == "项目":
                 task_list = self.projects
             else:
                 task_list = self.tasks
 
-            task = next((t for t in task_list if t.name == task_name), None)
-            if not task:
-                display_error("错误", "未找到选中的任务。")
-                return
-
             confirm = messagebox.askyesno("确认", f"确定要删除选中的{task_type}吗？")
             if confirm:
                 task_list.remove(task)
@@ -399,19 +382,14 @@ class TasksView:
             messagebox.showwarning("警告", "请选择要删除的任务！")
 
     def view_task(self):
-        selected_item = self.tree.selection()
+        selected_item = self.virtual.selection()
         if selected_item:
-            values = self.tree.item(selected_item, 'values')
-            task_name = values[0]
-            task_type = values[-1]
-            if task_type == "项目":
-                task = next((p for p in self.projects if p.name == task_name), None)
-            else:
-                task = next((t for t in self.tasks if t.name == task_name), None)
+            task = self.find_item(selected_item[0])
 
             if not task:
                 display_error("错误", "未找到选中的任务。")
                 return
+            task_type = self.item_type(task)
 
             if task_type == "项目":
                 abilities_str = ", ".join([ability.name for ability in task.abilities]) if task.abilities else "无"
@@ -447,19 +425,14 @@ class TasksView:
             messagebox.showwarning("警告", "请选择要查看的任务！")
 
     def update_progress(self):
-        selected_item = self.tree.selection()
+        selected_item = self.virtual.selection()
         if selected_item:
-            values = self.tree.item(selected_item, 'values')
-            task_name = values[0]
-            task_type = values[-1]
-            if task_type == "项目":
-                task = next((p for p in self.projects if p.name == task_name), None)
-            else:
-                task = next((t for t in self.tasks if t.name == task_name), None)
+            task = self.find_item(selected_item[0])
 
             if not task:
                 display_error("错误", "未找到选中的任务。")
                 return
+            task_type = self.item_type(task)
 
             progress_window = tk.Toplevel(self.parent)
             progress_window.title("更新进度")
@@ -484,13 +457,8 @@ class TasksView:
                     messagebox.showwarning("警告", "进度描述不能为空！")
                     return
 
-                task.progress = new_progress
-                task.progress_history.append((timestamp, description, new_progress))
-
-                if task_type == "项目":
-                    self.data_manager.save_projects(self.projects)
-                else:
-                    self.data_manager.save_tasks(self.tasks)
+                # 只向进度日志追加一条记录，不重写整个任务/项目文件
+                self.data_manager.record_progress(task, (timestamp, description, new_progress), self.tasks, self.projects)
 
                 # 同步每日进度
                 self.data_manager.synchronize_daily_progress()
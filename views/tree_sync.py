@@ -0,0 +1,95 @@
+# views/tree_sync.py
+from bisect import bisect_left
+
+
+class TreeSync:
+    """
+    按行 iid（模型 id）比较差异来刷新 Treeview 的顶层行。
+
+    记录上一次显示的每行的值和标签，刷新时只删除消失的行、插入新增的行、更新内容变化的行，
+    并只移动顺序改变的行（保留原顺序中最长的一段递增子序列不动）。没有变化的行不会被重新创建，
+    用户的选中状态和滚动位置得以保留。
+
+    使用 TreeSync 的 Treeview 只应通过 sync() 修改顶层行。
+    """
+
+    def __init__(self, tree):
+        """
+        :param tree: ttk.Treeview
+        """
+        self.tree = tree
+        self.rendered = {}  # iid -> (values, tags)
+        self.order = []  # 当前显示的 iid，按顺序
+
+    def sync(self, rows):
+        """
+        :param rows: [(iid, values)] 或 [(iid, values, tags)]，按希望显示的顺序排列
+        """
+        target = []
+        content = {}
+        for row in rows:
+            iid, values = row[0], tuple(row[1])
+            tags = tuple(row[2]) if len(row) > 2 else ()
+            if iid in content:
+                continue  # 同一个 iid 只显示一次
+            target.append(iid)
+            content[iid] = (values, tags)
+
+        stale = [iid for iid in self.order if iid not in content]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self.rendered[iid]
+
+        stable = self._stable(target)
+        remaining = len(self.rendered)  # 还没处理到的原有行数
+        for index, iid in enumerate(target):
+            values, tags = content[iid]
+            if iid not in self.rendered:
+                # 原有的行都已就位时直接追加到末尾，首次显示和追加新行都不必查询位置
+                position = 'end' if not remaining else self._position_after(target, index)
+                self.tree.insert('', position, iid=iid, values=values, tags=tags)
+            else:
+                remaining -= 1
+                if self.rendered[iid] != content[iid]:
+                    self.tree.item(iid, values=values, tags=tags)
+                if iid not in stable:
+                    position = self._position_after(target, index)
+                    if position and self.tree.index(iid) < position:
+                        position -= 1  # 移动时先从原位置取下，后面的行前移一位
+                    self.tree.move(iid, '', position)
+            self.rendered[iid] = content[iid]
+        self.order = target
+
+    def _position_after(self, target, index):
+        """新行或需要移动的行放在它在目标顺序中的前一行之后。"""
+        if index == 0:
+            return 0
+        return self.tree.index(target[index - 1]) + 1
+
+    def _stable(self, target):
+        """保留下来的行中，原有顺序与目标顺序一致的最长一组行，这些行不需要移动。"""
+        old_position = {iid: position for position, iid in enumerate(self.order)}
+        kept = [iid for iid in target if iid in old_position]
+
+        # 按原位置求最长递增子序列（耐心排序）
+        tails = []  # tails[k]：长度为 k+1 的递增子序列的最小末尾位置
+        tail_index = []
+        previous = [None] * len(kept)
+        for i, iid in enumerate(kept):
+            position = old_position[iid]
+            k = bisect_left(tails, position)
+            if k == len(tails):
+                tails.append(position)
+                tail_index.append(i)
+            else:
+                tails[k] = position
+                tail_index[k] = i
+            previous[i] = tail_index[k - 1] if k else None
+
+        stable = set()
+        i = tail_index[-1] if tail_index else None
+        while i is not None:
+            stable.add(kept[i])
+            i = previous[i]
+        return stable
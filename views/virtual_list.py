@@ -0,0 +1,135 @@
+# views/virtual_list.py
+from views.tree_sync import TreeSync
+
+
+class VirtualTreeview:
+    """
+    只把可见区域附近的行放进 Treeview 的“虚拟列表”。
+
+    完整的行数据（模型对象列表）保存在内存中，Treeview 里只有当前显示的若干行加上前后各
+    buffer 行的缓冲。在缓冲区内滚动只移动 Treeview 自身的视图；接近缓冲区边缘时，以当前位置
+    为中心从模型中重新取出一段行。外部滚动条按完整列表的长度显示位置。
+
+    行的 iid 为 row_id(item)，默认为模型 id；选中的行滚出缓冲区后仍会记住，滚回来时恢复选中。
+    """
+
+    def __init__(self, tree, scrollbar, row_values, row_id=None, buffer=50):
+        """
+        :param tree: ttk.Treeview
+        :param scrollbar: 纵向滚动条，由本类接管
+        :param row_values: 函数，item -> 该行各列的值
+        :param row_id: 函数，item -> 行的 iid，默认取 item.id
+        :param buffer: 可见区域前后各保留的行数
+        """
+        self.tree = tree
+        self.tree_sync = TreeSync(tree)
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+        self.row_id = row_id or (lambda item: item.id)
+        self.buffer = buffer
+
+        self.items = []
+        self.block_start = 0  # Treeview 中第一行在 items 中的下标
+        self.block = []  # Treeview 中的行 iid，按顺序
+        self.top = 0  # 可见区域第一行在 items 中的下标
+        self.visible = max(int(tree.cget('height')), 1)  # 可见行数，随窗口大小更新
+        self._selection = []
+        self._pending = None
+
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.scrollbar.configure(command=self.yview)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add='+')
+
+    def set_items(self, items):
+        """
+        替换完整的行数据并重新显示当前位置附近的行。
+
+        :param items: 模型对象列表（已经过滤、排序）
+        """
+        self.items = items
+        ids = {self.row_id(item) for item in items}
+        self._selection = [iid for iid in self._selection if iid in ids]
+        self._render(max(min(self.top, len(items) - self.visible), 0))
+
+    def selection(self):
+        """当前选中行的 iid，包括已滚出缓冲区的行。"""
+        return tuple(self._selection)
+
+    # ----------------- 滚动 ----------------- #
+    def yview(self, *args):
+        """外部滚动条的回调，参数与 Treeview.yview 相同。"""
+        total = len(self.items)
+        if not args or not total:
+            return
+        if args[0] == 'moveto':
+            top = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            top = self.top + int(args[1]) * step
+        else:
+            return
+        self.scroll_to(top)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.items) - self.visible))
+        block_end = self.block_start + len(self.block)
+        if self.block_start <= top and top + self.visible <= block_end:
+            self.tree.yview_moveto((top - self.block_start) / len(self.block))
+        else:
+            self._render(top)
+
+    def _on_tree_scroll(self, first, last):
+        """Treeview 自身滚动（滚轮、键盘、see）时换算为完整列表中的位置。"""
+        size = len(self.block)
+        if not size:
+            self.scrollbar.set(0, 1)
+            return
+        first, last = float(first), float(last)
+        self.top = self.block_start + round(first * size)
+        self.visible = max(round((last - first) * size), 1)
+        total = len(self.items)
+        self.scrollbar.set(self.top / total, min((self.top + self.visible) / total, 1))
+
+        # 接近缓冲区边缘且前后还有行时，重新取一段行
+        margin = self.buffer // 2
+        near_start = self.block_start > 0 and self.top - self.block_start < margin
+        block_end = self.block_start + size
+        near_end = block_end < total and block_end - (self.top + self.visible) < margin
+        if (near_start or near_end) and self._pending is None:
+            self._pending = self.tree.after_idle(self._rerender)
+
+    def _rerender(self):
+        self._pending = None
+        self._render(self.top)
+
+    # ----------------- 渲染 ----------------- #
+    def _render(self, top):
+        """以 top 为可见区域第一行，把 [top - buffer, top + visible + buffer) 的行放进 Treeview。"""
+        total = len(self.items)
+        self.top = top
+        self.block_start = max(top - self.buffer, 0)
+        block_end = min(top + self.visible + self.buffer, total)
+        window = self.items[self.block_start:block_end]
+
+        # 新的一段与原来的重叠部分不会被重新创建
+        rows = [(self.row_id(item), self.row_values(item)) for item in window]
+        self.tree_sync.sync(rows)
+        self.block = [iid for iid, _ in rows]
+
+        block = set(self.block)
+        rendered = [iid for iid in self._selection if iid in block]
+        if rendered:
+            self.tree.selection_set(rendered)
+        if self.block:
+            self.tree.yview_moveto((top - self.block_start) / len(self.block))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_select(self, event):
+        """记录用户的选择；滚出缓冲区而被删除的行保持选中。"""
+        block = set(self.block)
+        current = [iid for iid in self.tree.selection() if iid in block]
+        if current:
+            self._selection = current
+        else:
+            self._selection = [iid for iid in self._selection if iid not in block]